@@ -10,17 +10,294 @@ The default encoding is platform dependant.
 For a list of error handlers see
 :ref:`Error Handlers in module codecs <python:error-handlers>`.
 The default error handler is ``'strict'``.
+
+.. _ref-compression:
+
+The functions :func:`read_all`, :func:`read_lines`, :func:`iter_lines`,
+:func:`write_all`, and :func:`write_lines` can read and write compressed
+files. The compression is selected with the parameter ``compression``:
+
+============  ===
+``None``      no compression (default)
+``'auto'``    detected by the magic bytes at the start of the file when
+              reading and by the file extension (``.gz, .bz2, .xz, .zst``)
+              when writing
+``'gzip'``    see :mod:`gzip`
+``'bz2'``     see :mod:`bz2`
+``'xz'``      see :mod:`lzma`
+``'zstd'``    requires the package
+              `zstandard <https://pypi.org/project/zstandard/>`_
+============  ===
+
+When writing, the parameter ``compresslevel`` sets the compression level
+(``None`` for the default of the compression).
+
+.. _ref-instrumentation:
+
+The functions :func:`read_all`, :func:`read_lines`, :func:`write_all`,
+:func:`write_lines`, :func:`append_all`, :func:`append_lines`, and
+:func:`copyfile` can be instrumented with :func:`set_io_sink`. After each
+successful call an :class:`IORecord` is passed to the sink, which can be
+any callable, e.g. an :class:`IOHistogram`, a function returned by
+:func:`log_io_sink`, or a user defined function. Without a sink (the
+default) no measurements are made.
 """
 
 import datetime
+import errno
+import functools
+import hashlib
+import io
+import itertools
+import json
+import locale
+import mmap
 import os
+import select
+import stat
+import sys
+import threading
 import time
+from collections import namedtuple
+from contextlib import contextmanager, suppress
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .utils import check_path_like
+
+__all__ = ['HashIndex', 'IOHistogram', 'IORecord', 'RateLimiter', 'acopyfile',
+           'aiter_lines', 'append_all', 'append_lines', 'aread_all',
+           'awrite_all', 'copyfile', 'copytree', 'follow', 'iter_lines',
+           'iter_lines_reverse', 'iter_mapped_lines', 'log_io_sink',
+           'map_file', 'on_same_dev', 'read_all', 'read_lines', 'scan_lines',
+           'set_io_sink', 'sync_dir', 'touch', 'touch_many', 'walk',
+           'write_all', 'write_lines']
+
+
+def _open_gzip(fh, mode, level):
+    import gzip
+    return gzip.GzipFile('', mode + 'b', 9 if level is None else level, fh)
+
+
+def _open_bz2(fh, mode, level):
+    import bz2
+    return bz2.BZ2File(fh, mode, compresslevel=9 if level is None else level)
+
+
+def _open_xz(fh, mode, level):
+    import lzma
+    return lzma.LZMAFile(fh, mode, preset=None if mode == 'r' else level)
+
+
+def _open_zstd(fh, mode, level):
+    import zstandard
+    if mode == 'r':
+        return zstandard.ZstdDecompressor().stream_reader(
+            fh, read_across_frames=True, closefd=False)
+    return zstandard.ZstdCompressor(3 if level is None else level)\
+        .stream_writer(fh, closefd=False)
+
+
+_COMPRESSIONS = {'gzip': _open_gzip, 'bz2': _open_bz2, 'xz': _open_xz,
+                 'zstd': _open_zstd}
+_COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'),
+                      (b'\xfd7zXZ\x00', 'xz'), (b'\x28\xb5\x2f\xfd', 'zstd'))
+_COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz',
+                           '.zst': 'zstd'}
+
+
+def _check_compression(compression):
+    if compression and compression != 'auto' and \
+            compression not in _COMPRESSIONS:
+        raise ValueError('unknown compression: %s' % compression)
+
+
+@contextmanager
+def _open_compressed(raw_cm, mode, encoding, errors, compression,
+                     compresslevel):
+    # raw_cm is a context manager for the binary file.
+    with raw_cm as raw:
+        if compression == 'auto':
+            magic = raw.peek(6)[:6]
+            compression = next((c for m, c in _COMPRESSION_MAGIC
+                                if magic.startswith(m)), None)
+        if compression:
+            stream = _COMPRESSIONS[compression](raw, mode[0], compresslevel)
+        else:
+            stream = raw
+        with stream:
+            if 'b' in mode:
+                yield stream
+            else:
+                with io.TextIOWrapper(stream, encoding, errors) as fh:
+                    yield fh
+
+
+def _open_read(file, mode, encoding, errors, compression):
+    _check_compression(compression)
+    if not compression:
+        return open(file, mode, encoding=encoding, errors=errors)
+    return _open_compressed(open(file, 'rb'), mode, encoding, errors,
+                            compression, None)
+
+
+IORecord = namedtuple('IORecord', 'func, file, nbytes, seconds, throughput')
+IORecord.__doc__ = """\
+Class for I/O measurements with fields
+``func, file, nbytes, seconds, throughput``.
+
+``func`` is the name of the function, ``file`` the file (for
+:func:`copyfile` the source file), ``nbytes`` the number of bytes
+(or characters in text mode) read, written, or copied (for
+:func:`copyfile` the size of the source file), ``seconds`` the wall
+time and ``throughput`` ``nbytes`` per second.
+
+.. versionadded:: 0.18.0
+"""
+
+_io_sink = None
+
+
+def set_io_sink(sink):
+    """Set the sink for the I/O instrumentation.
+
+    See :ref:`above <ref-instrumentation>`. The sink may be called from
+    several threads at the same time.
+
+    :param sink: callable that takes an :class:`IORecord` or ``None``
+                 to disable the instrumentation
+    :return: the previous sink
+    :raises TypeError: if ``sink`` is not callable
+
+    .. versionadded:: 0.18.0
+    """
+    global _io_sink
+    if sink is not None and not callable(sink):
+        raise TypeError('sink must be callable')
+    prev, _io_sink = _io_sink, sink
+    return prev
+
+
+def log_io_sink(logger, level=None):
+    """Return a sink that logs the I/O measurements.
+
+    :param logging.Logger logger: the logger
+    :param int level: the log level (``None`` for :data:`logging.DEBUG`)
+    :return: the sink
+    :rtype: callable(IORecord)
+
+    .. versionadded:: 0.18.0
+    """
+    if level is None:
+        import logging
+        level = logging.DEBUG
+
+    def sink(rec):
+        logger.log(level, '%s(%r): %d bytes in %.6f s (%.0f bytes/s)',
+                   rec.func, rec.file, rec.nbytes, rec.seconds,
+                   rec.throughput)
+    return sink
+
+
+class IOHistogram:
+    """In-memory sink for the I/O instrumentation.
+
+    Collects the number of calls, bytes, and the wall time per function
+    and a histogram of the wall times with buckets that are powers of 2
+    microseconds. Instances can be shared between threads.
+
+    >>> hist = IOHistogram()
+    >>> prev_sink = set_io_sink(hist)
+    >>> content = read_all('/path/to/file')
+    >>> hist.stats()['read_all']
+    {'count': 1, 'nbytes': 38, 'seconds': 4.1e-05, 'histogram': {64: 1},
+     'throughput': 926829.3}
+
+    .. versionadded:: 0.18.0
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, rec):
+        bucket = 1 << int(rec.seconds * 1_000_000).bit_length()
+        with self._lock:
+            stats = self._stats.setdefault(rec.func, {
+                'count': 0, 'nbytes': 0, 'seconds': 0.0, 'histogram': {}})
+            stats['count'] += 1
+            stats['nbytes'] += rec.nbytes
+            stats['seconds'] += rec.seconds
+            hist = stats['histogram']
+            hist[bucket] = hist.get(bucket, 0) + 1
+
+    def stats(self):
+        """Return the collected statistics.
+
+        :return: mapping from function names to dictionaries with the keys
+                 ``count, nbytes, seconds, throughput, histogram``; the
+                 histogram maps upper bounds in microseconds to the number
+                 of calls
+        :rtype: dict
+        """
+        with self._lock:
+            result = {}
+            for func, stats in self._stats.items():
+                stats = dict(stats, histogram=dict(stats['histogram']))
+                stats['throughput'] = (stats['nbytes'] / stats['seconds']
+                                       if stats['seconds'] else 0.0)
+                result[func] = stats
+            return result
 
-__all__ = ['append_all', 'append_lines', 'copyfile', 'on_same_dev', 'read_all',
-           'read_lines', 'touch', 'write_all', 'write_lines']
+    def reset(self):
+        """Clear the collected statistics."""
+        with self._lock:
+            self._stats.clear()
 
 
-def read_all(file, binary=False, encoding=None, errors=None):
+def _instrumented(nbytes):
+    # nbytes is called with the result and the first argument
+    # and returns the number of bytes.
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sink = _io_sink
+            if sink is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            file = args[0] if args else kwargs.get('file', kwargs.get('src'))
+            cnt = nbytes(result, file)
+            sink(IORecord(func.__name__, file, cnt, seconds,
+                          cnt / seconds if seconds else 0.0))
+            return result
+        return wrapper
+    return decorator
+
+
+def _result_len(result, file):
+    return len(result)
+
+
+def _result_lines_len(result, file):
+    return sum(map(len, result)) + len(result)
+
+
+def _result_cnt(result, file):
+    return result
+
+
+def _src_size(result, file):
+    return _stat(file).st_size
+
+
+@_instrumented(_result_len)
+def read_all(file, binary=False, encoding=None, errors=None, *,
+             compression=None):
     """Read and return the content of the file.
 
     :param file: path to file or file descriptor
@@ -29,20 +306,26 @@ def read_all(file, binary=False, encoding=None, errors=None):
                         else as ``str``
     :param str encoding: name of the encoding (ignored if ``binary=True``)
     :param str errors: error handler (ignored if ``binary=True``)
+    :param str compression: see :ref:`compression <ref-compression>`
     :return: the file content
     :rtype: bytes or str
     :raises OSError: on I/O failure
+    :raises ValueError: if ``compression`` is unknown
 
     .. versionchanged:: 0.6.0
        Add parameter ``errors``
+    .. versionchanged:: 0.18.0
+       Add parameter ``compression``
     """
     mode, encoding, errors = (('rb', None, None) if binary
                               else ('rt', encoding, errors))
-    with open(file, mode=mode, encoding=encoding, errors=errors) as fh:
+    with _open_read(file, mode, encoding, errors, compression) as fh:
         return fh.read()
 
 
-def read_lines(file, predicate=None, encoding=None, errors=None):
+@_instrumented(_result_lines_len)
+def read_lines(file, predicate=None, encoding=None, errors=None, *,
+               compression=None):
     """Read and return the content of the file as a list of lines.
 
     Line breaks are not included in the resulting list.
@@ -57,25 +340,562 @@ def read_lines(file, predicate=None, encoding=None, errors=None):
     :type predicate: callable(str)
     :param str encoding: name of the encoding
     :param str errors: error handler
+    :param str compression: see :ref:`compression <ref-compression>`
     :return: list of lines
     :rtype: list(str)
     :raises OSError: on I/O failure
+    :raises ValueError: if ``compression`` is unknown
 
     .. versionchanged:: 0.6.0
        Add parameter ``errors``
+    .. versionchanged:: 0.18.0
+       Add parameter ``compression``
     """
-    result = []
-    with open(file, encoding=encoding, errors=errors) as fh:
-        for line in fh:
+    return list(iter_lines(file, predicate, encoding, errors,
+                           compression=compression))
+
+
+def iter_lines(file, predicate=None, encoding=None, errors=None, *,
+               start=0, stop=None, compression=None):
+    """Return an iterator over the lines of the file.
+
+    Like :func:`read_lines`, but the lines are read lazily. If a file
+    descriptor is given, it will be closed when the iterator is exhausted
+    or closed.
+
+    The lines from number ``start`` (counting from 0) up to but not
+    including number ``stop`` are read (as with :func:`itertools.islice`).
+    The ``predicate`` is applied to these lines only.
+
+    :param file: path to file or file descriptor
+    :type file: :term:`path-like object` or int
+    :param predicate: predicate function
+    :type predicate: callable(str)
+    :param str encoding: name of the encoding
+    :param str errors: error handler
+    :param int start: number of the first line
+    :param int stop: number of the line after the last line or ``None``
+                     for all lines up to the end of the file
+    :param str compression: see :ref:`compression <ref-compression>`
+    :return: iterator over the lines
+    :rtype: iterator(str)
+    :raises OSError: on I/O failure
+    :raises ValueError: if ``start`` or ``stop`` are negative or
+                        ``compression`` is unknown
+
+    .. versionadded:: 0.18.0
+    """
+    with _open_read(file, 'r', encoding, errors, compression) as fh:
+        for line in itertools.islice(fh, start, stop):
             line = line.rstrip('\n')
             if not predicate or predicate(line):
-                result.append(line)
-    return result
+                yield line
 
 
-def write_all(file, content, binary=False, encoding=None, errors=None):
+_REVERSE_BLOCK_SIZE = 64 * 1024
+
+
+def _strip_cr(line):
+    return line[:-1] if line.endswith(b'\r') else line
+
+
+def iter_lines_reverse(file, predicate=None, encoding=None, errors=None):
+    """Return an iterator over the lines of the file in reverse order.
+
+    Like :func:`iter_lines`, but the lines are yielded from the last to the
+    first. The file is read in blocks backwards from its end, so reading
+    the last lines of a large file is fast. If a file descriptor is given,
+    it will be closed when the iterator is exhausted or closed.
+
+    The file is split into lines at ``b'\\n'`` and the lines are decoded
+    when they are complete, so the encoding must be ASCII-compatible
+    (e.g. UTF-8, Latin-1). A ``b'\\r'`` before ``b'\\n'`` is removed, so
+    files with Windows line endings give the same lines as with
+    :func:`read_lines`; but unlike there, a lone ``b'\\r'`` does not
+    end a line.
+
+    :param file: path to file or file descriptor
+    :type file: :term:`path-like object` or int
+    :param predicate: predicate function
+    :type predicate: callable(str)
+    :param str encoding: name of the encoding
+    :param str errors: error handler
+    :return: iterator over the lines
+    :rtype: iterator(str)
+    :raises OSError: on I/O failure
+
+    .. versionadded:: 0.18.0
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    errors = errors or 'strict'
+    with open(file, 'rb', buffering=0) as fh:
+        pos = size = fh.seek(0, os.SEEK_END)
+        rest = b''
+        while pos > 0:
+            cnt = min(_REVERSE_BLOCK_SIZE, pos)
+            pos -= cnt
+            fh.seek(pos)
+            lines = (fh.read(cnt) + rest).split(b'\n')
+            if pos + cnt == size and not lines[-1]:
+                lines.pop()
+            rest = lines[0]
+            for line in reversed(lines[1:]):
+                line = _strip_cr(line).decode(encoding, errors)
+                if not predicate or predicate(line):
+                    yield line
+        if size:
+            line = _strip_cr(rest).decode(encoding, errors)
+            if not predicate or predicate(line):
+                yield line
+
+
+_SCAN_BLOCK_SIZE = 1024 * 1024
+_SCAN_MIN_RANGE_SIZE = 1024 * 1024
+_SCAN_RANGES_PER_WORKER = 4
+
+
+def _scan_range(file, start, end, predicate, encoding, errors, positions):
+    # Return the matching lines in the byte range as (local line number,
+    # byte offset or None, line) and the number of lines in the range.
+    matches = []
+    lineno = 0
+    with open(file, 'rb') as fh:
+        fh.seek(start)
+        pos = start
+        while pos < end:
+            block = fh.read(min(_SCAN_BLOCK_SIZE, end - pos))
+            if not block:
+                break
+            if pos + len(block) < end:
+                block += fh.readline()
+            offset = pos
+            pos += len(block)
+            if block.endswith(b'\n'):
+                block = block[:-1]
+            if positions:
+                for line in block.split(b'\n'):
+                    text = _strip_cr(line).decode(encoding, errors)
+                    if predicate(text):
+                        matches.append((lineno, offset, text))
+                    offset += len(line) + 1
+                    lineno += 1
+            else:
+                # CRLF like with universal newlines in read_lines()
+                block = _strip_cr(block.replace(b'\r\n', b'\n'))
+                for line in block.decode(encoding, errors).split('\n'):
+                    if predicate(line):
+                        matches.append((lineno, None, line))
+                    lineno += 1
+    return matches, lineno
+
+
+def _scan_ranges(file, size, cnt):
+    # Split the file into cnt byte ranges that start at line boundaries.
+    bounds = [0]
+    with open(file, 'rb') as fh:
+        for i in range(1, cnt):
+            pos = size * i // cnt
+            if pos <= bounds[-1]:
+                continue
+            fh.seek(pos - 1)
+            pos += len(fh.readline()) - 1
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def scan_lines(file, predicate, workers=None, encoding=None, errors=None, *,
+               positions=False):
+    """Return the lines of the file for which the predicate returns ``True``.
+
+    Like ``read_lines(file, predicate)``, but the file is split into byte
+    ranges at line boundaries which are scanned in parallel in a pool of
+    processes (see :class:`~concurrent.futures.ProcessPoolExecutor`).
+    Therefore the ``predicate`` must be picklable, e.g. a function defined
+    at the top level of a module. Small files are scanned in the current
+    process.
+
+    The file is split into lines at ``b'\\n'``, so the encoding must be
+    ASCII-compatible (e.g. UTF-8, Latin-1). A ``b'\\r'`` before
+    ``b'\\n'`` is removed (see :func:`iter_lines_reverse`).
+
+    If ``positions=True`` a tuple with the line number (counting from 0),
+    the byte offset of the line in the file, and the line is returned
+    for each line.
+
+    :param file: path to file
+    :type file: :term:`path-like object`
+    :param predicate: predicate function
+    :type predicate: callable(str)
+    :param int workers: number of processes (defaults to the number of CPUs)
+    :param str encoding: name of the encoding
+    :param str errors: error handler
+    :param bool positions: if ``True`` return line numbers and byte offsets
+    :return: list of lines in file order
+    :rtype: list(str) or list(tuple(int, int, str))
+    :raises OSError: on I/O failure
+    :raises TypeError: if ``file`` is not a path
+
+    .. versionadded:: 0.18.0
+    """
+    check_path_like(file, 'file')
+    encoding = encoding or locale.getpreferredencoding(False)
+    errors = errors or 'strict'
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(file)
+    cnt = min(workers * _SCAN_RANGES_PER_WORKER,
+              size // _SCAN_MIN_RANGE_SIZE)
+    if workers < 2 or cnt < 2:
+        results = [_scan_range(file, 0, size, predicate, encoding, errors,
+                               positions)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_scan_range, file, start, end,
+                                       predicate, encoding, errors, positions)
+                       for start, end in _scan_ranges(file, size, cnt)]
+            results = [future.result() for future in futures]
+    lines = []
+    first_lineno = 0
+    for matches, line_cnt in results:
+        if positions:
+            lines.extend((first_lineno + lineno, offset, line)
+                         for lineno, offset, line in matches)
+        else:
+            lines.extend(line for _, _, line in matches)
+        first_lineno += line_cnt
+    return lines
+
+
+def _map(file):
+    with open(file, 'rb') as fh:
+        if not os.fstat(fh.fileno()).st_size:
+            return None
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def map_file(file):
+    """Map the file into memory and return a read-only view of its content.
+
+    Unlike ``read_all(file, binary=True)`` the content is not copied into
+    a ``bytes`` object. It is read on demand from the page cache, which can
+    be shared by multiple processes. The mapping will be closed when the
+    returned :class:`memoryview` is released or garbage collected.
+
+    :param file: path to file or file descriptor
+    :type file: :term:`path-like object` or int
+    :return: the file content
+    :rtype: memoryview
+    :raises OSError: on I/O failure
+
+    .. versionadded:: 0.18.0
+    """
+    mm = _map(file)
+    return memoryview(mm if mm is not None else b'')
+
+
+def iter_mapped_lines(file, predicate=None):
+    """Return an iterator over the lines of the memory mapped file.
+
+    Like :func:`iter_lines`, but the file is mapped into memory (see
+    :func:`map_file`) and split into lines at ``b'\\n'``. The lines are
+    returned as ``bytes`` so that they can be filtered without decoding
+    each of them.
+
+    If ``predicate`` is given, it must be a callable that takes a single
+    line as its argument and returns a bool. Only the lines for which
+    ``True`` is returned are included in the result.
+
+    :param file: path to file or file descriptor
+    :type file: :term:`path-like object` or int
+    :param predicate: predicate function
+    :type predicate: callable(bytes)
+    :return: iterator over the lines
+    :rtype: iterator(bytes)
+    :raises OSError: on I/O failure
+
+    .. versionadded:: 0.18.0
+    """
+    mm = _map(file)
+    if mm is None:
+        return
+    with mm:
+        pos = 0
+        size = len(mm)
+        while pos < size:
+            end = mm.find(b'\n', pos)
+            if end == -1:
+                end = size
+            line = mm[pos:end]
+            pos = end + 1
+            if not predicate or predicate(line):
+                yield line
+
+
+# IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+# IN_CREATE | IN_DELETE from linux/inotify.h
+_INOTIFY_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+_FOLLOW_CHUNK_SIZE = 64 * 1024
+
+
+class _InotifyWatcher:
+
+    def __init__(self, dirpath):
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self._fd, os.fsencode(dirpath),
+                                  _INOTIFY_MASK) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+    def wait(self, timeout):
+        if select.select([self._fd], [], [], timeout)[0]:
+            with suppress(BlockingIOError):
+                while os.read(self._fd, _FOLLOW_CHUNK_SIZE):
+                    pass
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollWatcher:
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+def _watcher(dirpath):
+    if sys.platform.startswith('linux'):
+        with suppress(OSError, AttributeError):
+            return _InotifyWatcher(dirpath)
+    return _PollWatcher()
+
+
+def _file_id(st):
+    return st.st_dev, st.st_ino
+
+
+def follow(file, predicate=None, encoding=None, errors=None, *,
+           from_start=False, interval=1.0, cancel_evt=None):
+    """Return an iterator over the lines appended to a growing file.
+
+    Like ``tail -f``: the iterator yields new complete lines as they are
+    appended to the file and waits for more. If the file is truncated,
+    reading starts again at its beginning. If the file is replaced
+    (e.g. rotated by a log rotation tool), the rest of the old file is read
+    and then the new file is followed from its beginning. If the file does
+    not exist (yet), it is waited for.
+
+    On Linux inotify is used to wait for changes, so idle followers do not
+    need CPU time; else the file is polled every ``interval`` seconds.
+
+    The file is read in binary mode and split into lines at ``b'\\n'``,
+    so the encoding must be ASCII-compatible (e.g. UTF-8, Latin-1).
+    A ``b'\\r'`` before ``b'\\n'`` is removed, so files with Windows line
+    endings give the same lines as with :func:`read_lines`; but unlike
+    there, a lone ``b'\\r'`` does not end a line.
+
+    If ``predicate`` is given, it must be a callable that takes a single
+    line as its argument and returns a bool. Only the lines for which
+    ``True`` is returned are included in the result.
+
+    :param file: path to file
+    :type file: :term:`path-like object`
+    :param predicate: predicate function
+    :type predicate: callable(str)
+    :param str encoding: name of the encoding
+    :param str errors: error handler
+    :param bool from_start: if ``True`` start with the lines already in the
+                            file else at its end
+    :param float interval: poll interval in seconds (with inotify the
+                           max. time between two checks of the file)
+    :param threading.Event cancel_evt: if set the iterator will stop
+    :return: iterator over the lines
+    :rtype: iterator(str)
+    :raises OSError: on I/O failure
+
+    .. versionadded:: 0.18.0
+    """
+    path = os.path.abspath(os.fsdecode(file))
+    encoding = encoding or locale.getpreferredencoding(False)
+    errors = errors or 'strict'
+    watcher = _watcher(os.path.dirname(path))
+    fh = None
+    rest = b''
+    try:
+        while not (cancel_evt and cancel_evt.is_set()):
+            if fh is None:
+                with suppress(FileNotFoundError):
+                    fh = open(path, 'rb', buffering=0)
+                    file_id = _file_id(os.fstat(fh.fileno()))
+                    if not from_start:
+                        fh.seek(0, os.SEEK_END)
+                from_start = True
+            if fh is not None:
+                for chunk in iter(lambda: fh.read(_FOLLOW_CHUNK_SIZE), b''):
+                    *lines, rest = (rest + chunk).split(b'\n')
+                    for line in lines:
+                        line = _strip_cr(line).decode(encoding, errors)
+                        if not predicate or predicate(line):
+                            yield line
+                if os.fstat(fh.fileno()).st_size < fh.tell():
+                    fh.seek(0)
+                    rest = b''
+                    continue
+                try:
+                    replaced = _file_id(os.stat(path)) != file_id
+                except FileNotFoundError:
+                    replaced = True
+                if replaced:
+                    fh.close()
+                    fh = None
+                    if rest:
+                        line = _strip_cr(rest).decode(encoding, errors)
+                        rest = b''
+                        if not predicate or predicate(line):
+                            yield line
+                    if os.path.exists(path):
+                        continue
+            watcher.wait(interval)
+    finally:
+        if fh is not None:
+            fh.close()
+        watcher.close()
+
+
+_WRITE_BATCH_SIZE = 1024
+
+
+def _write_lines(fh, lines):
+    # Write the lines in batches, so that they need not be in memory
+    # all at once.
+    it = iter(lines)
+    cnt = 0
+    while True:
+        batch = list(itertools.islice(it, _WRITE_BATCH_SIZE))
+        if not batch:
+            break
+        batch.append('')
+        cnt += fh.write('\n'.join(batch))
+    return cnt or fh.write('\n')
+
+
+_DURABILITY_LEVELS = ('none', 'fdatasync', 'full')
+
+
+def sync_dir(dirpath):
+    """Flush the directory entries of a directory to disk.
+
+    This makes the creation, renaming, or deletion of the files in the
+    directory durable. It has no effect on Windows.
+
+    Can be used to make several writes with ``atomic=True`` and
+    ``durability='fdatasync'`` (see :func:`write_all`) in the same directory
+    durable with only one call.
+
+    :param dirpath: path to the directory
+    :type dirpath: :term:`path-like object`
+    :raises OSError: on I/O failure
+
+    .. versionadded:: 0.18.0
+    """
+    if os.name == 'nt':
+        return
+    fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _open_atomic(file, mode, encoding, errors, durability):
+    path = os.path.abspath(os.fsdecode(file))
+    dirpath, name = os.path.split(path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp = os.path.join(dirpath, '.%s.%s.tmp' % (name, os.urandom(4).hex()))
+        try:
+            fd = os.open(tmp, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with suppress(FileNotFoundError):
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        with open(fd, mode, encoding=encoding, errors=errors) as fh:
+            yield fh
+            fh.flush()
+            if durability == 'fdatasync' and hasattr(os, 'fdatasync'):
+                os.fdatasync(fh.fileno())
+            elif durability != 'none':
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp)
+        raise
+    if durability == 'full':
+        sync_dir(dirpath)
+
+
+def _open_write(file, mode, encoding, errors, atomic, durability,
+                compression=None, compresslevel=None):
+    if durability not in _DURABILITY_LEVELS:
+        raise ValueError('unknown durability: %s' % durability)
+    _check_compression(compression)
+    if atomic:
+        check_path_like(file, 'file')
+    if compression == 'auto':
+        compression = (None if isinstance(file, int) else
+                       _COMPRESSION_EXTENSIONS.get(
+                           os.path.splitext(os.fsdecode(file))[1]))
+    if compression:
+        if atomic:
+            raw_cm = _open_atomic(file, mode[0] + 'b', None, None, durability)
+        else:
+            raw_cm = open(file, mode[0] + 'b')
+        return _open_compressed(raw_cm, mode, encoding, errors, compression,
+                                compresslevel)
+    if atomic:
+        return _open_atomic(file, mode, encoding, errors, durability)
+    return open(file, mode=mode, encoding=encoding, errors=errors)
+
+
+@_instrumented(_result_cnt)
+def write_all(file, content, binary=False, encoding=None, errors=None, *,
+              atomic=False, durability='none', compression=None,
+              compresslevel=None):
     """Write the content to a file.
 
+    .. _ref-atomic-write:
+
+    If ``atomic=True`` the content is written to a temporary file in the
+    same directory, which then replaces the file with :func:`os.replace`.
+    So readers will either see the old or the new content. In this case
+    ``file`` must be a path.
+
+    The ``durability`` (only used if ``atomic=True``) may be:
+
+    ===============  ===
+    ``'none'``       no flushing to disk
+    ``'fdatasync'``  the data of the file is flushed to disk before replacing
+                     the file (see :func:`os.fdatasync`)
+    ``'full'``       like ``'fdatasync'`` but with all metadata and the
+                     directory is flushed to disk as well (see
+                     :func:`sync_dir`)
+    ===============  ===
+
     :param file: path to file or file descriptor
     :type file: :term:`path-like object` or int
     :param content: file content
@@ -83,40 +903,66 @@ def write_all(file, content, binary=False, encoding=None, errors=None):
     :param bool binary: if ``True`` the content must be ``bytes`` else ``str``
     :param str encoding: name of the encoding (ignored if ``binary=True``)
     :param str errors: error handler (ignored if ``binary=True``)
-    :return: number of bytes or characters written
+    :param bool atomic: if ``True`` replace the file atomically
+    :param str durability: see above
+    :param str compression: see :ref:`compression <ref-compression>`
+    :param int compresslevel: compression level
+    :return: number of bytes or characters written (uncompressed)
     :rtype: int
     :raises OSError: on I/O failure
+    :raises TypeError: if ``atomic=True`` and ``file`` is not a path
+    :raises ValueError: if ``durability`` or ``compression`` is unknown
 
     .. versionchanged:: 0.6.0
        Add parameter ``errors``
+    .. versionchanged:: 0.18.0
+       Add parameters ``atomic``, ``durability``, ``compression``,
+       and ``compresslevel``
     """
     mode, encoding, errors = (('wb', None, None) if binary
                               else ('wt', encoding, errors))
-    with open(file, mode=mode, encoding=encoding, errors=errors) as fh:
+    with _open_write(file, mode, encoding, errors, atomic, durability,
+                     compression, compresslevel) as fh:
         return fh.write(content)
 
 
-def write_lines(file, lines, encoding=None, errors=None):
+@_instrumented(_result_cnt)
+def write_lines(file, lines, encoding=None, errors=None, *, atomic=False,
+                durability='none', compression=None, compresslevel=None):
     """Write the lines to a file.
 
+    For ``atomic`` and ``durability`` see :ref:`write_all()
+    <ref-atomic-write>`.
+
     :param file: path to file or file descriptor
     :type file: :term:`path-like object` or int
-    :param list(str) lines: list of strings w/o newline
+    :param lines: strings w/o newline
+    :type lines: iterable(str)
     :param str encoding: name of the encoding
     :param str errors: error handler
-    :return: number of characters written
+    :param bool atomic: if ``True`` replace the file atomically
+    :param str durability: see :func:`write_all`
+    :param str compression: see :ref:`compression <ref-compression>`
+    :param int compresslevel: compression level
+    :return: number of characters written (uncompressed)
     :rtype: int
     :raises OSError: on I/O failure
+    :raises TypeError: if ``atomic=True`` and ``file`` is not a path
+    :raises ValueError: if ``durability`` or ``compression`` is unknown
 
     .. versionchanged:: 0.6.0
        Add parameter ``errors``
+    .. versionchanged:: 0.18.0
+       ``lines`` can be any iterable;
+       add parameters ``atomic``, ``durability``, ``compression``,
+       and ``compresslevel``
     """
-    with open(file, 'w', encoding=encoding, errors=errors) as fh:
-        cnt = fh.write('\n'.join(lines))
-        cnt += fh.write('\n')
-        return cnt
+    with _open_write(file, 'w', encoding, errors, atomic, durability,
+                     compression, compresslevel) as fh:
+        return _write_lines(fh, lines)
 
 
+@_instrumented(_result_cnt)
 def append_all(file, content, binary=False, encoding=None, errors=None):
     """Append the content to a file.
 
@@ -140,12 +986,14 @@ def append_all(file, content, binary=False, encoding=None, errors=None):
         return fh.write(content)
 
 
+@_instrumented(_result_cnt)
 def append_lines(file, lines, encoding=None, errors=None):
     """Append the lines to a file.
 
     :param file: path to file or file descriptor
     :type file: :term:`path-like object` or int
-    :param list(str) lines: list of strings w/o newline
+    :param lines: strings w/o newline
+    :type lines: iterable(str)
     :param str encoding: name of the encoding
     :param str errors: error handler
     :return: number of characters written
@@ -154,11 +1002,11 @@ def append_lines(file, lines, encoding=None, errors=None):
 
     .. versionchanged:: 0.6.0
        Add parameter ``errors``
+    .. versionchanged:: 0.18.0
+       ``lines`` can be any iterable
     """
     with open(file, 'a', encoding=encoding, errors=errors) as fh:
-        cnt = fh.write('\n'.join(lines))
-        cnt += fh.write('\n')
-        return cnt
+        return _write_lines(fh, lines)
 
 
 def touch(filepath, new_time=None, atime=True, mtime=True, create=True):
@@ -188,26 +1036,107 @@ def touch(filepath, new_time=None, atime=True, mtime=True, create=True):
 
     .. versionadded:: 0.5.0
     """
-    if not os.path.exists(filepath) and create:
-        with open(filepath, 'w'):
-            pass
-    file_atime = os.path.getatime(filepath)
-    file_mtime = os.path.getmtime(filepath)
+    _touch(filepath, _touch_times(new_time), atime, mtime, create, True)
+
+
+def _touch_times(new_time):
+    # Return access and modification time in nanoseconds.
     if new_time is None:
-        atime_s = mtime_s = time.time()
-    elif isinstance(new_time, (int, float)):
-        atime_s = mtime_s = new_time
+        new_time = time.time()
     elif isinstance(new_time, datetime.datetime):
-        atime_s = mtime_s = new_time.timestamp()
+        new_time = new_time.timestamp()
     elif isinstance(new_time, time.struct_time):
-        atime_s = mtime_s = time.mktime(new_time)
+        new_time = time.mktime(new_time)
     elif isinstance(new_time, (str, bytes, os.PathLike)):
-        atime_s = os.path.getatime(new_time)
-        mtime_s = os.path.getmtime(new_time)
-    else:
+        st = _stat(new_time)
+        return st.st_atime_ns, st.st_mtime_ns
+    elif not isinstance(new_time, (int, float)):
         raise TypeError('wrong type for argument new_time')
-    os.utime(filepath, (atime_s if atime else file_atime,
-                        mtime_s if mtime else file_mtime))
+    ns = int(new_time * 1_000_000_000)
+    return ns, ns
+
+
+def _create(filepath):
+    with open(filepath, 'a'):
+        pass
+
+
+def _touch(filepath, times, atime, mtime, create, follow_symlinks):
+    if isinstance(filepath, int):
+        # a file descriptor never refers to a symbolic link
+        follow_symlinks = True
+    if not (atime and mtime):
+        try:
+            st = _stat(filepath, follow_symlinks)
+        except FileNotFoundError:
+            if not create:
+                raise
+            _create(filepath)
+            st = os.stat(filepath)
+        times = (times[0] if atime else st.st_atime_ns,
+                 times[1] if mtime else st.st_mtime_ns)
+    try:
+        os.utime(filepath, ns=times, follow_symlinks=follow_symlinks)
+    except FileNotFoundError:
+        if not create:
+            raise
+        _create(filepath)
+        os.utime(filepath, ns=times, follow_symlinks=follow_symlinks)
+
+
+def _touch_safe(filepath, *args):
+    try:
+        _touch(filepath, *args)
+    except OSError as ex:
+        return ex
+    return None
+
+
+def touch_many(filepaths, new_time=None, atime=True, mtime=True, create=True,
+               *, follow_symlinks=True, max_workers=1):
+    """Change the timestamps of many files.
+
+    Like :func:`touch` but ``new_time`` is resolved only once and
+    at most one :func:`os.stat` call is made per file. A failure for one
+    file does not abort the whole batch.
+
+    If ``follow_symlinks=False`` the timestamps of symbolic links are
+    changed instead of those of the files they refer to (not supported on
+    all platforms, see :data:`os.supports_follow_symlinks`); it is ignored
+    for file descriptors.
+
+    :param filepaths: the files for which the timestamps should be changed
+                      (file descriptors are supported on platforms in
+                      :data:`os.supports_fd`)
+    :type filepaths: iterable(:term:`path-like object` or int)
+    :param new_time: the new time (see :func:`touch`)
+    :param bool atime: if ``True`` change access time
+    :param bool mtime: if ``True`` change modification time
+    :param bool create: if ``True`` an empty file will be created if it
+                        does not exist
+    :param bool follow_symlinks: if ``False`` do not follow symbolic links
+    :param int max_workers: if greater than 1 the files are processed in
+                            a pool with that many threads
+    :return: mapping from the files that could not be changed to
+             the exceptions
+    :rtype: dict
+    :raises FileNotFoundError: if the reference file for ``new_time`` does
+                               not exist
+    :raises TypeError: if ``new_time`` is of wrong type
+
+    .. versionadded:: 0.18.0
+    """
+    times = _touch_times(new_time)
+    args = (times, atime, mtime, create, follow_symlinks)
+    filepaths = list(filepaths)
+    if max_workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as executor:
+            results = executor.map(lambda f: _touch_safe(f, *args), filepaths)
+            results = list(results)
+    else:
+        results = [_touch_safe(f, *args) for f in filepaths]
+    return {f: ex for f, ex in zip(filepaths, results) if ex is not None}
 
 
 def on_same_dev(file1, file2):
@@ -222,25 +1151,620 @@ def on_same_dev(file1, file2):
     :return: ``True`` if both files are on the same device/partition
     :rtype: bool
     """
-    stat1 = os.stat(file1)
-    stat2 = os.stat(file2)
-    return stat1.st_dev == stat2.st_dev
+    return _stat(file1).st_dev == _stat(file2).st_dev
+
+
+def _stat(file, follow_symlinks=True):
+    # Use the cached stat result of entries returned by walk().
+    if isinstance(file, os.DirEntry):
+        return file.stat(follow_symlinks=follow_symlinks)
+    return os.stat(file, follow_symlinks=follow_symlinks)
+
+
+def _mtime_ns(value):
+    return None if value is None else _touch_times(value)[1]
+
+
+def walk(top, predicate=None, *, min_size=None, max_size=None,
+         newer_than=None, older_than=None, dirs=False, follow_symlinks=False,
+         onerror=None):
+    """Walk a directory tree and yield the entries for its files.
+
+    Unlike :func:`os.walk` the entries are :class:`os.DirEntry` objects,
+    which cache the result of their :meth:`~os.DirEntry.stat` method.
+    They can be passed to the other functions in this module which then
+    use the cached result instead of calling :func:`os.stat` again.
+
+    The entries can be filtered during the traversal by their size
+    (``min_size <= size <= max_size``), by their modification time
+    (``newer_than < mtime < older_than``), and by a ``predicate``, which
+    must be a callable that takes an entry as its argument and returns a
+    bool. For ``newer_than`` and ``older_than`` the same types as for the
+    ``new_time`` parameter of :func:`touch` (except ``None``) can be used.
+    The directories are traversed top-down.
+
+    :param top: the root directory
+    :type top: :term:`path-like object`
+    :param predicate: predicate function
+    :type predicate: callable(os.DirEntry)
+    :param int min_size: min. size in bytes
+    :param int max_size: max. size in bytes
+    :param newer_than: the entries must be modified after this time
+    :param older_than: the entries must be modified before this time
+    :param bool dirs: if ``True`` the entries for directories are yielded
+                      too (size and time filters are not applied to them)
+    :param bool follow_symlinks: if ``True`` follow symbolic links to
+                                 directories else they are treated like
+                                 directories that are not descended into
+    :param onerror: called with the :exc:`OSError` if a directory cannot
+                    be read (default: ignore the error)
+    :type onerror: callable(OSError)
+    :return: iterator over the entries
+    :rtype: iterator(os.DirEntry)
+    :raises TypeError: if ``newer_than`` or ``older_than`` is of wrong type
+
+    .. versionadded:: 0.18.0
+    """
+    newer_ns = _mtime_ns(newer_than)
+    older_ns = _mtime_ns(older_than)
+    need_stat = (min_size is not None or max_size is not None or
+                 newer_ns is not None or older_ns is not None)
+    stack = [top]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError as ex:
+            if onerror:
+                onerror(ex)
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    subdirs.append(entry.path)
+                    if not dirs:
+                        continue
+                elif entry.is_symlink() and entry.is_dir():
+                    # a link to a directory that is not followed
+                    if not dirs:
+                        continue
+                elif need_stat:
+                    st = entry.stat()
+                    if ((min_size is not None and st.st_size < min_size) or
+                            (max_size is not None and st.st_size > max_size) or
+                            (newer_ns is not None and
+                             st.st_mtime_ns <= newer_ns) or
+                            (older_ns is not None and
+                             st.st_mtime_ns >= older_ns)):
+                        continue
+            except OSError as ex:
+                if onerror:
+                    onerror(ex)
+                continue
+            if not predicate or predicate(entry):
+                yield entry
+        stack.extend(reversed(subdirs))
 
 
 _COPY_CHUNK_SIZE = 16 * 1024
+_COPY_MAX_CHUNK_SIZE = 4 * 1024 * 1024
+_COPY_MAX_CHUNK_TIME = 0.1
+_COPY_SLICE_SIZE = 8 * 1024 * 1024
+
+# errors that mean the kernel cannot copy between these two files
+_COPY_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                   errno.EBADF, errno.ENOTSUP,
+                                   errno.EOPNOTSUPP, errno.ENOTSOCK})
+
+
+class RateLimiter:
+    """Token bucket that limits the throughput of copy processes.
+
+    Tokens (bytes) are refilled at ``rate`` bytes per second up to
+    ``burst`` (default: the number of bytes of one second). A copy process
+    takes the tokens for each slice or chunk it has copied and waits if
+    the bucket runs into debt.
+
+    One instance can be shared between several copy processes (even in
+    different threads) to limit their total throughput. The rate can be
+    changed at any time; waiting processes pick the new rate up within
+    0.1 seconds.
+
+    ::
+
+        limiter = RateLimiter(10 * 1024 * 1024)
+        with ThreadPoolExecutor() as executor:
+            for src, dst in jobs:
+                executor.submit(copyfile, src, dst, None, evt,
+                                limiter=limiter)
+        ...
+        limiter.rate = 50 * 1024 * 1024  # from another thread
+
+    :param float rate: max. number of bytes per second
+    :param float burst: max. number of bytes that can be consumed without
+                        waiting or ``None``
+    :raises ValueError: if ``rate`` or ``burst`` is not > 0
+
+    .. versionadded:: 0.18.0
+    """
+
+    _MAX_SLEEP = 0.1
+
+    def __init__(self, rate, burst=None):
+        if burst is not None and burst <= 0:
+            raise ValueError('burst must be > 0')
+        self._lock = threading.Lock()
+        self._rate = self._check_rate(rate)
+        self._burst = burst
+        self._tokens = self._capacity()
+        self._last = time.monotonic()
+
+    @staticmethod
+    def _check_rate(rate):
+        if rate <= 0:
+            raise ValueError('rate must be > 0')
+        return rate
+
+    def _capacity(self):
+        return self._rate if self._burst is None else self._burst
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity(),
+                           self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    @property
+    def rate(self):
+        """The max. number of bytes per second (can be set)."""
+        return self._rate
+
+    @rate.setter
+    def rate(self, value):
+        value = self._check_rate(value)
+        with self._lock:
+            self._refill()
+            self._rate = value
+
+    def _step_size(self):
+        # size of a kernel copy slice: 1/10 s worth of data
+        return int(min(_COPY_SLICE_SIZE,
+                       max(_COPY_CHUNK_SIZE * 4, self._rate / 10)))
+
+    def consume(self, n, cancel_evt=None):
+        """Take ``n`` tokens and wait until the bucket is out of debt.
+
+        :param int n: number of bytes
+        :param threading.Event cancel_evt: if set, stop waiting
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= n
+        while True:
+            with self._lock:
+                self._refill()
+                wait = -self._tokens / self._rate
+            if wait <= 0 or (cancel_evt and cancel_evt.is_set()):
+                return
+            time.sleep(min(wait, self._MAX_SLEEP))
+
+
+def _copy_file_range(ifd, ofd, count):
+    return os.copy_file_range(ifd, ofd, count)
+
+
+def _sendfile(ifd, ofd, count):
+    offset = os.lseek(ifd, 0, os.SEEK_CUR)
+    cnt = os.sendfile(ofd, ifd, offset, count)
+    os.lseek(ifd, cnt, os.SEEK_CUR)
+    return cnt
+
+
+_FICLONE = 0x40049409  # from linux/fs.h
+
+
+def _clone(ifd, ofd):
+    # Return True if ofd was made a copy-on-write clone of ifd.
+    if (fcntl is None or not sys.platform.startswith('linux') or
+            not on_same_dev(ifd, ofd)):
+        return False
+    try:
+        fcntl.ioctl(ofd, _FICLONE, ifd)
+    except OSError as ex:
+        if ex.errno in _COPY_FALLBACK_ERRNOS or ex.errno == errno.ENOTTY:
+            return False
+        raise
+    return True
+
+
+_KERNEL_COPY_FUNCS = []
+if hasattr(os, 'copy_file_range'):
+    _KERNEL_COPY_FUNCS.append(_copy_file_range)
+if sys.platform.startswith('linux') and hasattr(os, 'sendfile'):
+    _KERNEL_COPY_FUNCS.append(_sendfile)
+
+
+def _write_all(fh, data):
+    while data:
+        cnt = fh.write(data)
+        data = data[cnt:]
+
+
+def _iter_chunks(ifh, ofh, chunk_size, count, hashes=(), limiter=None,
+                 cancel_evt=None):
+    # Copy through a reused buffer. If chunk_size is None the chunk size
+    # is doubled as long as the throughput does not drop and a chunk takes
+    # less than _COPY_MAX_CHUNK_TIME seconds. The hash objects in hashes are
+    # updated with the copied data. If limiter is given, its tokens are
+    # consumed after each chunk (the waiting is not part of the measured
+    # throughput).
+    adaptive = not chunk_size
+    view = memoryview(bytearray(chunk_size or _COPY_CHUNK_SIZE))
+    rate = 0.0
+    while count is None or count > 0:
+        start = time.monotonic()
+        cnt = ifh.readinto(view if count is None else view[:count])
+        if not cnt:
+            break
+        _write_all(ofh, view[:cnt])
+        for hash_obj in hashes:
+            hash_obj.update(view[:cnt])
+        if count is not None:
+            count -= cnt
+        if adaptive and cnt == len(view):
+            elapsed = time.monotonic() - start
+            new_rate = cnt / elapsed if elapsed else float('inf')
+            if (new_rate >= rate and elapsed < _COPY_MAX_CHUNK_TIME and
+                    cnt < _COPY_MAX_CHUNK_SIZE):
+                rate = new_rate
+                view = memoryview(bytearray(cnt * 2))
+            else:
+                adaptive = False
+        if limiter:
+            limiter.consume(cnt, cancel_evt)
+        yield cnt
+
+
+def _iter_copy(ifh, ofh, chunk_size=None, count=None, limiter=None,
+               cancel_evt=None):
+    # Copy from the current position of ifh to its end (or count bytes)
+    # and yield the number of bytes copied in each step. ifh and ofh must
+    # be unbuffered.
+    ifd, ofd = ifh.fileno(), ofh.fileno()
+    for func in _KERNEL_COPY_FUNCS:
+        copied = 0
+        try:
+            while count is None or copied < count:
+                size = limiter._step_size() if limiter else _COPY_SLICE_SIZE
+                cnt = func(ifd, ofd, size if count is None
+                           else min(size, count - copied))
+                if not cnt:
+                    break
+                copied += cnt
+                if limiter:
+                    limiter.consume(cnt, cancel_evt)
+                yield cnt
+        except OSError as ex:
+            if copied or ex.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+            continue
+        if copied:
+            return
+    yield from _iter_chunks(ifh, ofh, chunk_size, count, None, limiter,
+                            cancel_evt)
+
+
+def _is_sparse(fd):
+    if not hasattr(os, 'SEEK_DATA'):
+        return False
+    st = os.fstat(fd)
+    return st.st_blocks * 512 < st.st_size
+
+
+def _data_extents(fd, size):
+    # Yield (start, end) of the data regions in the file.
+    pos = 0
+    while pos < size:
+        try:
+            start = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as ex:
+            if ex.errno == errno.ENXIO:  # only a hole up to the end
+                break
+            if pos == 0 and ex.errno == errno.EINVAL:  # not supported
+                yield 0, size
+                break
+            raise
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        pos = end
+
+
+def _iter_sparse_copy(ifh, ofh, size, chunk_size, limiter=None,
+                      cancel_evt=None):
+    # Like _iter_copy but only the data regions are copied. The steps
+    # over holes are yielded too (without consuming tokens of limiter).
+    pos = 0
+    for start, end in _data_extents(ifh.fileno(), size):
+        if start > pos:
+            yield start - pos
+        ifh.seek(start)
+        ofh.seek(start)
+        yield from _iter_copy(ifh, ofh, chunk_size, end - start, limiter,
+                              cancel_evt)
+        pos = end
+    ofh.truncate(size)
+    if pos < size:
+        yield size - pos
+
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class HashIndex:
+    """Index of the content hashes of files.
+
+    The hashes (BLAKE2b) are stored together with the size and modification
+    time of the files. A hash is only computed again if one of them has
+    changed. If ``path`` is given, the index is loaded from this file if it
+    exists and can be saved with :meth:`save`.
+
+    Instances can be shared between threads.
+
+    :param path: path to the index file
+    :type path: :term:`path-like object`
+
+    .. versionadded:: 0.18.0
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            with suppress(FileNotFoundError):
+                self._entries = json.loads(read_all(path, encoding='utf-8'))
+
+    @staticmethod
+    def _key(file):
+        return os.path.abspath(os.fsdecode(os.fspath(file)))
+
+    def _set(self, file, st, digest):
+        with self._lock:
+            self._entries[self._key(file)] = [st.st_size, st.st_mtime_ns,
+                                              digest]
+
+    def digest(self, file):
+        """Return the hash of the content of a file.
+
+        :param file: path to the file or entry returned by :func:`walk`
+        :type file: :term:`path-like object`
+        :return: the hash as hex digest
+        :rtype: str
+        :raises OSError: on I/O failure
+        """
+        st = _stat(file)
+        with self._lock:
+            entry = self._entries.get(self._key(file))
+        if entry and entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return entry[2]
+        hash_obj = hashlib.blake2b(digest_size=16)
+        view = memoryview(bytearray(_HASH_BLOCK_SIZE))
+        with open(file, 'rb', buffering=0) as fh:
+            for cnt in iter(lambda: fh.readinto(view), 0):
+                hash_obj.update(view[:cnt])
+        digest = hash_obj.hexdigest()
+        self._set(file, st, digest)
+        return digest
+
+    def find(self, digest, size, within=None):
+        """Find a file with the given hash and size.
+
+        Only files whose size and modification time have not changed since
+        their hash was computed are returned.
+
+        :param str digest: the hash as hex digest
+        :param int size: the file size
+        :param within: if given, the file must be in this directory tree
+        :type within: :term:`path-like object`
+        :return: path to the file or ``None`` if not found
+        :rtype: str or None
+        """
+        prefix = '' if within is None else os.path.join(self._key(within), '')
+        with self._lock:
+            candidates = [(path, entry[1])
+                          for path, entry in self._entries.items()
+                          if entry[0] == size and entry[2] == digest and
+                          path.startswith(prefix)]
+        for path, mtime_ns in candidates:
+            with suppress(OSError):
+                st = os.stat(path)
+                if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    return path
+        return None
+
+    def save(self):
+        """Save the index to the file given with ``path``.
+
+        :raises OSError: on I/O failure
+        """
+        with self._lock:
+            content = json.dumps(self._entries)
+        write_all(self._path, content, encoding='utf-8', atomic=True)
+
+
+def _identical(src, src_stat, dst, hash_index):
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if dst_stat.st_size != src_stat.st_size:
+        return False
+    if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    return hash_index.digest(src) == hash_index.digest(dst)
+
+
+_JOURNAL_SUFFIX = '.journal'
+_JOURNAL_INTERVAL = 64 * 1024 * 1024
+_JOURNAL_HASH = 'sha256'
+
 
+def _read_journal(path):
+    try:
+        return json.loads(read_all(path, encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
 
-def copyfile(src, dst, callback, cancel_evt):
+
+def _write_journal(path, src_stat, offset, hash_obj):
+    journal = {'size': src_stat.st_size, 'mtime_ns': src_stat.st_mtime_ns,
+               'offset': offset, 'algorithm': hash_obj.name,
+               'digest': hash_obj.hexdigest()}
+    write_all(path, json.dumps(journal), encoding='utf-8', atomic=True)
+
+
+def _verified_offset(ofh, journal, src_stat, checksum):
+    # Return the offset up to which ofh has been verified against the
+    # journal, the journal hash object and the checksum hash object (or
+    # None) for this prefix. The journal always uses _JOURNAL_HASH, so
+    # that the checksum may differ from the one of the interrupted call.
+    hash_obj = hashlib.new(_JOURNAL_HASH)
+    check_obj = hashlib.new(checksum) if checksum else None
+    if (not journal or journal.get('size') != src_stat.st_size or
+            journal.get('mtime_ns') != src_stat.st_mtime_ns or
+            journal.get('algorithm') != hash_obj.name):
+        return 0, hash_obj, check_obj
+    offset = journal.get('offset', 0)
+    view = memoryview(bytearray(_COPY_MAX_CHUNK_SIZE))
+    pos = 0
+    while pos < offset:
+        cnt = ofh.readinto(view[:min(len(view), offset - pos)])
+        if not cnt:
+            break
+        hash_obj.update(view[:cnt])
+        if check_obj:
+            check_obj.update(view[:cnt])
+        pos += cnt
+    if pos == offset and hash_obj.hexdigest() == journal.get('digest'):
+        return offset, hash_obj, check_obj
+    return (0, hashlib.new(_JOURNAL_HASH),
+            hashlib.new(checksum) if checksum else None)
+
+
+def _copy_verified(src, src_stat, dst, chunk_size, resume, checksum,
+                   limiter, report, cancel_evt):
+    journal_path = os.fsdecode(dst) + _JOURNAL_SUFFIX
+    journal = _read_journal(journal_path) if resume else None
+    mode = 'r+b' if journal and os.path.exists(dst) else 'w+b'
+    with open(src, 'rb', buffering=0) as ifh, \
+            open(dst, mode, buffering=0) as ofh:
+        if resume:
+            copied, hash_obj, check_obj = _verified_offset(
+                ofh, journal, src_stat, checksum)
+        else:
+            copied, hash_obj, check_obj = 0, None, hashlib.new(checksum)
+        hashes = tuple(x for x in (hash_obj, check_obj) if x)
+        journaled = copied
+        ofh.truncate(copied)
+        ofh.seek(copied)
+        ifh.seek(copied)
+        if copied:
+            report(copied)
+        for cnt in _iter_chunks(ifh, ofh, chunk_size, None, hashes,
+                                limiter, cancel_evt):
+            copied += cnt
+            report(copied)
+            if cancel_evt and cancel_evt.is_set():
+                break
+            if resume and copied - journaled >= _JOURNAL_INTERVAL:
+                _write_journal(journal_path, src_stat, copied, hash_obj)
+                journaled = copied
+        else:
+            if resume:
+                with suppress(FileNotFoundError):
+                    os.remove(journal_path)
+            return check_obj.hexdigest() if check_obj else None
+        if resume:
+            _write_journal(journal_path, src_stat, copied, hash_obj)
+    return None
+
+
+@_instrumented(_src_size)
+def copyfile(src, dst, callback, cancel_evt, *, chunk_size=None,
+             throughput=False, clone=False, sparse=True, resume=False,
+             checksum=None, dedup=False, hash_index=None,
+             max_bytes_per_sec=None, limiter=None):
     r"""Copy a file.
 
     The progess of a long running copy process can be monitored
     and the process can be cancelled.
 
+    On Linux the data is copied by the kernel with
+    :func:`os.copy_file_range` or :func:`os.sendfile` in slices of 8 MiB.
+    If that is not possible (e.g. if the files are on different file
+    systems and the kernel does not support this) or on other platforms
+    the data is copied in chunks through a reused buffer.
+
+    If ``clone=True`` and both files are on the same file system, on Linux
+    the destination file will be a copy-on-write clone of the source file
+    if the file system supports it (e.g. Btrfs, XFS). In this case the
+    callback is called only once with the full size.
+
+    If ``sparse=True`` and the source file is a sparse file, only the data
+    regions will be copied and the holes recreated in the destination file
+    if the platform supports this (see :data:`os.SEEK_DATA`). The progress
+    is still reported against the size of the source file.
+
+    If ``resume=True`` the progress is recorded in a journal file
+    (the destination filepath with the suffix ``.journal``) every 64 MiB and
+    when the process is cancelled. The next call with ``resume=True`` checks
+    the already copied data against a hash in the journal and continues
+    from there if it matches (the ``checksum`` may differ from the one of
+    the interrupted call). The journal is deleted when the file has
+    been copied completely.
+
+    If ``checksum`` is the name of an algorithm supported by
+    :func:`hashlib.new` the checksum of the file is computed while
+    copying and returned.
+
+    If ``dedup=True`` and the destination file exists, it is compared with
+    the source file: first by size and modification time, then, if only
+    the modification times differ, by a hash of their content (which is
+    cached in ``hash_index`` if given). If the files are identical, nothing
+    is copied and the callback is called only once with the full size.
+    Otherwise the file is copied and the modification time of the source
+    file is set on the destination file, so that the next comparison needs
+    no hashing. If the destination file has other hard links, it is
+    replaced by a new file instead of being overwritten, so that the other
+    links keep their content.
+
+    If ``resume=True`` or ``checksum`` is set, the data is always copied
+    through a buffer and the parameters ``clone`` and ``sparse`` are
+    ignored.
+
+    If ``chunk_size`` is ``None`` the chunk size starts at 16 KiB and is
+    doubled (up to 4 MiB) as long as the measured throughput does not drop.
+    Otherwise the given chunk size is used for the whole file.
+
+    If ``max_bytes_per_sec`` is set, the throughput is limited to this
+    number of bytes per second. To share a limit between several copy
+    processes or to change it while copying, pass a :class:`RateLimiter`
+    as ``limiter`` instead. The kernel copies data in slices of 1/10
+    second's worth of data then (at least 64 KiB). Holes in sparse files
+    do not count. A cancelled copy process stops waiting for the limiter.
+
     The ``callback`` must be a callable that takes two parameters:
 
     - number of the copied bytes
     - size of the source file
 
+    If ``throughput=True`` it takes a third parameter:
+
+    - average throughput since the start in bytes per second
+
+    It is called after each slice or chunk.
+
     ::
 
         def cb(i, t):
@@ -265,19 +1789,390 @@ def copyfile(src, dst, callback, cancel_evt):
     :type dst: :term:`path-like object`
     :param callback: callback function
     :param threading.Event cancel_evt: if set the process will be cancelled
+    :param int chunk_size: fixed chunk size in bytes or ``None``
+    :param bool throughput: if ``True`` the throughput is passed to
+                            the callback
+    :param bool clone: if ``True`` try to clone the file
+    :param bool sparse: if ``True`` preserve holes in sparse files
+    :param bool resume: if ``True`` resume a cancelled or failed copy process
+    :param str checksum: name of a hash algorithm
+    :param bool dedup: if ``True`` skip identical files
+    :param HashIndex hash_index: index for the content hashes
+    :param float max_bytes_per_sec: max. throughput in bytes per second
+    :param RateLimiter limiter: limiter for the throughput
+    :return: hex digest of the file if ``checksum`` is set and the file was
+             copied completely, else ``None``
+    :rtype: str or None
     :raises OSError: if the file could not be copied
+    :raises ValueError: if ``chunk_size < 1``, the hash algorithm
+                        is unknown, ``max_bytes_per_sec`` is not > 0, or
+                        ``max_bytes_per_sec`` and ``limiter`` are both set
 
     .. versionadded:: 0.5.0
+    .. versionchanged:: 0.18.0
+       Use kernel-side copying on Linux;
+       add parameters ``chunk_size``, ``throughput``, ``clone``,
+       ``sparse``, ``resume``, ``checksum``, ``dedup``, ``hash_index``,
+       ``max_bytes_per_sec``, and ``limiter``
     """
-    file_size = os.path.getsize(src)
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError('chunk_size must be >= 1')
+    if max_bytes_per_sec is not None:
+        if limiter is not None:
+            raise ValueError(
+                'max_bytes_per_sec and limiter are mutually exclusive')
+        limiter = RateLimiter(max_bytes_per_sec)
+    if checksum:
+        hashlib.new(checksum)
+    src_stat = _stat(src)
+    file_size = src_stat.st_size
+    start = time.monotonic()
+
+    def report(copied):
+        if callback:
+            if throughput:
+                elapsed = time.monotonic() - start
+                callback(copied, file_size,
+                         copied / elapsed if elapsed else 0.0)
+            else:
+                callback(copied, file_size)
+
+    if dedup and _identical(src, src_stat, dst, hash_index or HashIndex()):
+        report(file_size)
+        return None
+    if dedup:
+        _break_link(dst)
+    if resume or checksum:
+        result = _copy_verified(src, src_stat, dst, chunk_size, resume,
+                                checksum, limiter, report, cancel_evt)
+    else:
+        result = _copy_data(src, dst, file_size, chunk_size, clone, sparse,
+                            limiter, report, cancel_evt)
+    if dedup and not (cancel_evt and cancel_evt.is_set()):
+        os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return result
+
+
+def _copy_data(src, dst, file_size, chunk_size, clone, sparse, limiter,
+               report, cancel_evt):
     copied = 0
-    with open(src, 'rb') as ifh, open(dst, 'wb') as ofh:
-        while True:
-            cnt = ofh.write(ifh.read(_COPY_CHUNK_SIZE))
-            if not cnt:
-                break
+    with open(src, 'rb', buffering=0) as ifh, \
+            open(dst, 'wb', buffering=0) as ofh:
+        if clone and _clone(ifh.fileno(), ofh.fileno()):
+            report(file_size)
+            return None
+        if sparse and _is_sparse(ifh.fileno()):
+            steps = _iter_sparse_copy(ifh, ofh, file_size, chunk_size,
+                                      limiter, cancel_evt)
+        else:
+            steps = _iter_copy(ifh, ofh, chunk_size, None, limiter,
+                               cancel_evt)
+        for cnt in steps:
             copied += cnt
-            if callback:
-                callback(copied, file_size)
+            report(copied)
             if cancel_evt and cancel_evt.is_set():
                 break
+    return None
+
+
+class _TreeProgress:
+
+    def __init__(self, callback, total):
+        self._callback = callback
+        self._total = total
+        self._done = 0
+        self._lock = threading.Lock()
+
+    def file_callback(self):
+        last = 0
+
+        def cb(copied, size):
+            nonlocal last
+            with self._lock:
+                self._done += copied - last
+                last = copied
+                if self._callback:
+                    self._callback(self._done, self._total)
+        return cb
+
+
+def _scan_tree(src, dst, dirs, files, links):
+    with os.scandir(src) as it:
+        for entry in it:
+            target = os.path.join(dst, entry.name)
+            if entry.is_symlink():
+                links.append((entry.path, target))
+            elif entry.is_dir():
+                dirs.append(target)
+                _scan_tree(entry.path, target, dirs, files, links)
+            elif entry.is_file():
+                files.append((entry.stat().st_size, entry, target))
+            # special files (FIFOs, sockets, devices) are skipped
+
+
+def _link(target, dst):
+    # Replace dst atomically with a hard link to target.
+    tmp = '%s.%s.tmp' % (dst, os.urandom(4).hex())
+    try:
+        os.link(target, tmp)
+    except OSError:
+        return False
+    try:
+        os.replace(tmp, dst)
+    except OSError:
+        os.remove(tmp)
+        return False
+    return True
+
+
+def _break_link(dst):
+    # Remove dst if it has other hard links (e.g. created by copytree with
+    # link=True), so that writing to it does not change the other names.
+    try:
+        st = os.lstat(dst)
+    except FileNotFoundError:
+        return
+    if st.st_nlink > 1 and stat.S_ISREG(st.st_mode):
+        os.remove(dst)
+
+
+def _copy_tree_file(src, dst, callback, cancel_evt, clone, dedup,
+                    hash_index, link, limiter, root):
+    if cancel_evt and cancel_evt.is_set():
+        return
+    digest = None
+    if link:
+        src_stat = _stat(src)
+        if not _identical(src, src_stat, dst, hash_index):
+            digest = hash_index.digest(src)
+            target = hash_index.find(digest, src_stat.st_size, root)
+            if target and _link(target, dst):
+                callback(src_stat.st_size, src_stat.st_size)
+                return
+    if not (dedup or link):  # else done by copyfile if not identical
+        _break_link(dst)
+    copyfile(src, dst, callback, cancel_evt, clone=clone,
+             dedup=dedup or link, hash_index=hash_index, limiter=limiter)
+    if digest and not (cancel_evt and cancel_evt.is_set()):
+        hash_index._set(dst, os.stat(dst), digest)
+
+
+def copytree(src, dst, callback, cancel_evt, *, max_workers=None,
+             clone=False, dedup=False, hash_index=None, link=False,
+             max_bytes_per_sec=None, limiter=None):
+    """Copy a directory tree.
+
+    Missing directories are created and existing files are overwritten.
+    Symbolic links are copied as symbolic links. Special files (named
+    pipes, sockets, device files) are skipped. Like with
+    :func:`copyfile` only the content of the files is copied.
+
+    The files are copied with :func:`copyfile` in a pool of threads,
+    the largest files first. If ``clone=True`` and source and destination
+    are on the same device (see :func:`on_same_dev`) the files are cloned
+    where possible (see :func:`copyfile`).
+
+    If ``dedup=True`` files that are identical to the existing destination
+    files are skipped (see :func:`copyfile`). If ``link=True`` (implies
+    ``dedup=True``) a file whose content is already in the ``hash_index``
+    for a file in the destination directory (e.g. from an earlier run or
+    from a file copied before in the same run) will be a hard link to that
+    file instead of a copy, if possible. Destination files with several
+    hard links are always replaced by new files instead of being
+    overwritten, so that a changed source file does not change the other
+    links.
+
+    ``max_bytes_per_sec`` or ``limiter`` limit the total throughput of
+    all threads (see :func:`copyfile` and :class:`RateLimiter`).
+
+    The ``callback`` must be a callable that takes two parameters:
+
+    - number of the copied bytes of all files
+    - total size of all files
+
+    It is called from the worker threads, but never concurrently.
+
+    :param src: source directory
+    :type src: :term:`path-like object`
+    :param dst: destination directory
+    :type dst: :term:`path-like object`
+    :param callback: callback function
+    :param threading.Event cancel_evt: if set the process will be cancelled
+    :param int max_workers: max. number of threads (see
+                            :class:`~concurrent.futures.ThreadPoolExecutor`)
+    :param bool clone: if ``True`` try to clone the files
+    :param bool dedup: if ``True`` skip identical files
+    :param HashIndex hash_index: index for the content hashes
+    :param bool link: if ``True`` create hard links for identical content
+    :param float max_bytes_per_sec: max. total throughput in bytes per
+                                    second
+    :param RateLimiter limiter: limiter for the total throughput
+    :raises OSError: if a file could not be copied
+    :raises ValueError: if ``max_bytes_per_sec`` is not > 0 or
+                        ``max_bytes_per_sec`` and ``limiter`` are both set
+
+    .. versionadded:: 0.18.0
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    if max_bytes_per_sec is not None:
+        if limiter is not None:
+            raise ValueError(
+                'max_bytes_per_sec and limiter are mutually exclusive')
+        limiter = RateLimiter(max_bytes_per_sec)
+    if (dedup or link) and hash_index is None:
+        hash_index = HashIndex()
+    dirs, files, links = [dst], [], []
+    _scan_tree(src, dst, dirs, files, links)
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+    clone = clone and on_same_dev(src, dst)
+    for symlink, target in links:
+        if os.path.lexists(target):
+            os.remove(target)
+        os.symlink(os.readlink(symlink), target)
+    files.sort(key=lambda x: x[0], reverse=True)
+    progress = _TreeProgress(callback, sum(x[0] for x in files))
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_copy_tree_file, s, d,
+                                   progress.file_callback(), cancel_evt,
+                                   clone, dedup, hash_index, link, limiter,
+                                   dst)
+                   for _, s, d in files]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+_ASYNC_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+_ASYNC_LINES_BATCH_SIZE = 1024
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+
+def _get_async_executor():
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _async_executor = ThreadPoolExecutor(_ASYNC_MAX_WORKERS)
+        return _async_executor
+
+
+def _run_async(func, *args, **kwargs):
+    # asyncio is imported here because it is slow to import and only
+    # needed by the asynchronous functions
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(_get_async_executor(),
+                                functools.partial(func, *args, **kwargs))
+
+
+async def aread_all(file, binary=False, encoding=None, errors=None, *,
+                    compression=None):
+    """Asynchronous version of :func:`read_all`.
+
+    The asynchronous functions run the I/O in a shared thread pool
+    so that the event loop is not blocked.
+
+    .. versionadded:: 0.18.0
+    """
+    return await _run_async(read_all, file, binary, encoding, errors,
+                            compression=compression)
+
+
+async def awrite_all(file, content, binary=False, encoding=None, errors=None,
+                     *, atomic=False, durability='none', compression=None,
+                     compresslevel=None):
+    """Asynchronous version of :func:`write_all`.
+
+    .. versionadded:: 0.18.0
+    """
+    return await _run_async(write_all, file, content, binary, encoding,
+                            errors, atomic=atomic, durability=durability,
+                            compression=compression,
+                            compresslevel=compresslevel)
+
+
+def _next_lines(it, lock):
+    with lock:
+        return list(itertools.islice(it, _ASYNC_LINES_BATCH_SIZE))
+
+
+def _close_lines(it, lock):
+    with lock:
+        it.close()
+
+
+async def aiter_lines(file, predicate=None, encoding=None, errors=None, *,
+                      start=0, stop=None, compression=None):
+    """Asynchronous version of :func:`iter_lines`.
+
+    Returns an :term:`asynchronous iterator`. The lines are read
+    in batches.
+
+    .. versionadded:: 0.18.0
+    """
+    it = iter_lines(file, predicate, encoding, errors, start=start,
+                    stop=stop, compression=compression)
+    lock = threading.Lock()
+    try:
+        while True:
+            lines = await _run_async(_next_lines, it, lock)
+            if not lines:
+                break
+            for line in lines:
+                yield line
+    finally:
+        _get_async_executor().submit(_close_lines, it, lock)
+
+
+async def acopyfile(src, dst, callback=None, **kwargs):
+    """Asynchronous version of :func:`copyfile`.
+
+    Instead of a :class:`threading.Event` the copy process is cancelled
+    by cancelling the task.
+
+    The ``callback`` must be a coroutine function. It is called with the
+    same arguments as the callback of :func:`copyfile` and awaited before
+    the next progress is reported.
+
+    :param src: source filepath
+    :type src: :term:`path-like object`
+    :param dst: destination filepath (not a directory)
+    :type dst: :term:`path-like object`
+    :param callback: callback coroutine function
+    :param kwargs: keyword arguments for :func:`copyfile`
+                   (except ``cancel_evt``)
+    :raises OSError: if the file could not be copied
+    :raises TypeError: if ``cancel_evt`` is given
+
+    .. versionadded:: 0.18.0
+    """
+    if 'cancel_evt' in kwargs:
+        raise TypeError('acopyfile() does not take cancel_evt; '
+                        'cancel the task instead')
+    import asyncio
+    loop = asyncio.get_event_loop()
+    queue = asyncio.Queue()
+    cancel_evt = threading.Event()
+
+    def cb(*args):
+        loop.call_soon_threadsafe(queue.put_nowait, args)
+
+    future = _run_async(copyfile, src, dst, cb if callback else None,
+                        cancel_evt, **kwargs)
+    future.add_done_callback(lambda f: queue.put_nowait(None))
+    try:
+        while True:
+            args = await queue.get()
+            if args is None:
+                break
+            await callback(*args)
+        await future
+    except BaseException:
+        cancel_evt.set()
+        raise
@@ -7,22 +7,27 @@ import configparser
 import math
 import re
 import string
+import sys
 import unicodedata
 from collections import namedtuple
 from datetime import timedelta
 from functools import lru_cache
+from itertools import repeat
+from operator import add, itemgetter
 
 from wcwidth import wcswidth
 
 from .utils import check_type
 
-__all__ = ['BINARY_PREFIXES', 'BOOLEAN_STATES', 'DECIMAL_PREFIXES', 'NO_PREFIX',
-           'Prefix', 'TranslationTable', 'bin_prefix', 'dec_prefix',
-           'find_bin_prefix', 'find_dec_prefix', 'format_bin_prefix',
-           'format_dec_prefix', 'format_timedelta', 'insert_separator',
-           'int2str', 'is_hexdigit', 'parse_timedelta', 'purge', 'shorten',
-           'slugify', 'split_host_port', 'str2bool', 'str2port', 'str2tuple',
-           'walign', 'wlen', 'wshorten']
+__all__ = ['BINARY_PREFIXES', 'BOOLEAN_STATES', 'DECIMAL_PREFIXES',
+           'NO_PREFIX', 'Prefix', 'TimedeltaFormat', 'TimedeltaParser',
+           'TranslationTable', 'bin_prefix', 'dec_prefix', 'find_bin_prefix',
+           'find_dec_prefix', 'format_bin_prefix', 'format_bin_prefix_many',
+           'format_dec_prefix', 'format_dec_prefix_many', 'format_timedelta',
+           'insert_separator', 'int2str', 'is_hexdigit', 'parse_timedelta',
+           'purge', 'shorten', 'slugify', 'split_host_port', 'str2bool',
+           'str2bool_many', 'str2port', 'str2port_many', 'str2tuple',
+           'str2tuple_many', 'walign', 'wlen', 'wshorten']
 
 BOOLEAN_STATES = configparser.ConfigParser.BOOLEAN_STATES.copy()
 """Dictionary with mappings from strings to boolean values.
@@ -102,6 +107,166 @@ def str2port(s):
     raise ValueError('not a valid port number: %d' % port)
 
 
+def _numpy(values):
+    # Return the numpy module if values is a NumPy array. NumPy is
+    # not imported here: if it has not been imported yet, values cannot
+    # be an array.
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(values, np.ndarray):
+        return np
+    return None
+
+
+def _str_array(np, values):
+    # Return a one-dimensional array of strings as unicode array.
+    if values.ndim != 1:
+        raise ValueError('values must be a one-dimensional array')
+    if values.dtype.kind == 'O' and all(isinstance(x, str)
+                                        for x in values.tolist()):
+        return values.astype(str)
+    if values.dtype.kind not in 'US':
+        raise TypeError('values must be strings')
+    return values.astype(str)
+
+
+def _match_states(np, values):
+    true = np.zeros(values.shape, bool)
+    false = np.zeros(values.shape, bool)
+    for k, v in BOOLEAN_STATES.items():
+        if v:
+            true |= values == k
+        else:
+            false |= values == k
+    return true, false
+
+
+def str2bool_many(values):
+    """Convert many strings to boolean values.
+
+    Like :func:`str2bool` but instead of raising an exception on the first
+    invalid string, the indices of all invalid strings are returned.
+
+    If ``values`` is a one-dimensional NumPy array, the conversion is
+    vectorized and the boolean values are returned as a NumPy array
+    (invalid strings are ``False``). Otherwise they are returned as a list
+    (invalid strings are ``None``).
+
+    >>> str2bool_many(['yes', 'Off', 'maybe', '1'])
+    ([True, False, None, True], [2])
+
+    :param values: the strings
+    :type values: iterable(str) or numpy.ndarray
+    :return: the boolean values and the indices of the invalid strings
+    :rtype: tuple(list or numpy.ndarray, list(int))
+    :raises TypeError: if a NumPy array does not contain strings
+    :raises ValueError: if a NumPy array is not one-dimensional
+
+    .. versionadded:: 0.18.0
+    """
+    np = _numpy(values)
+    if np:
+        values = _str_array(np, values)
+        true, false = _match_states(np, values)
+        # lowercasing is slow, so only do it for the strings not matched yet
+        idx = np.flatnonzero(~(true | false))
+        if idx.size:
+            true[idx], false[idx] = _match_states(
+                np, np.char.lower(values[idx]))
+        return true, np.flatnonzero(~(true | false)).tolist()
+    get = BOOLEAN_STATES.get
+    result = [get(s.lower()) for s in values]
+    return result, [i for i, v in enumerate(result) if v is None]
+
+
+def str2port_many(values):
+    """Convert many strings to network port numbers.
+
+    Like :func:`str2port` but instead of raising an exception on the first
+    invalid string, the indices of all invalid strings are returned.
+
+    If ``values`` is a one-dimensional NumPy array, the conversion is
+    vectorized and the port numbers are returned as a NumPy array
+    (invalid strings are ``-1``). Otherwise they are returned as a list
+    (invalid strings are ``None``).
+
+    >>> str2port_many(['80', '443', 'http', '65536'])
+    ([80, 443, None, None], [2, 3])
+
+    :param values: the strings
+    :type values: iterable(str) or numpy.ndarray
+    :return: the port numbers and the indices of the invalid strings
+    :rtype: tuple(list or numpy.ndarray, list(int))
+    :raises TypeError: if a NumPy array does not contain strings
+    :raises ValueError: if a NumPy array is not one-dimensional
+
+    .. versionadded:: 0.18.0
+    """
+    np = _numpy(values)
+    if np:
+        values = _str_array(np, values)
+        try:
+            ports = values.astype(np.int64)
+        except (ValueError, OverflowError):
+            # at least one string NumPy cannot parse: let int() decide
+            result, errors = str2port_many(values.tolist())
+            return np.array([-1 if p is None else p for p in result],
+                            np.int32), errors
+        invalid = (ports < 0) | (ports > 65535)
+        ports[invalid] = -1
+        return ports.astype(np.int32), np.flatnonzero(invalid).tolist()
+    result = []
+    errors = []
+    for i, s in enumerate(values):
+        try:
+            port = int(s)
+        except ValueError:
+            port = -1
+        if 0 <= port <= 65535:
+            result.append(port)
+        else:
+            result.append(None)
+            errors.append(i)
+    return result, errors
+
+
+def str2tuple_many(values, sep=',', converter=None, *, maxsplit=-1):
+    """Convert many strings to tuples.
+
+    Like :func:`str2tuple` but instead of raising an exception on the first
+    string for which ``converter`` raises a :exc:`ValueError`, the indices
+    of all such strings are returned.
+
+    >>> str2tuple_many(['1, 2', '', '3, x'], converter=int)
+    ([(1, 2), (), None], [2])
+
+    :param values: the strings
+    :type values: iterable(str)
+    :param str sep: the separator (whitespace around ``sep`` will be ignored)
+    :param converter: the converter function
+    :type converter: callable(str)
+    :param int maxsplit: max. number of splits (-1 means no limit)
+    :return: the tuples (``None`` for invalid strings) and the indices of
+             the invalid strings
+    :rtype: tuple(list, list(int))
+
+    .. versionadded:: 0.18.0
+    """
+    f = converter or str
+    result = []
+    errors = []
+    for i, s in enumerate(values):
+        if not s:
+            result.append(())
+            continue
+        try:
+            result.append(tuple([f(x.strip())
+                                 for x in s.split(sep, maxsplit)]))
+        except ValueError:
+            result.append(None)
+            errors.append(i)
+    return result, errors
+
+
 def split_host_port(s, port=None):
     """Split a string into host and port.
 
@@ -345,6 +510,58 @@ yocto    y     10\ :sup:`-24`
 =====  ======  ======
 """
 
+# prefixes in ascending order of their factors
+_BIN_TABLE = sorted(BINARY_PREFIXES, key=lambda p: p.factor)
+_DEC_SKIPPED = ('hecto', 'deca', 'deci', 'centi')
+_DEC_TABLES = {
+    False: sorted(DECIMAL_PREFIXES, key=lambda p: p.factor),
+    True: sorted((p for p in DECIMAL_PREFIXES if p.name not in _DEC_SKIPPED),
+                 key=lambda p: p.factor)
+}
+_DEC_MIN_EXP = round(math.log10(_DEC_TABLES[False][0].factor))
+_DEC_MAX_EXP = round(math.log10(_DEC_TABLES[False][-1].factor))
+
+
+def _dec_index(table):
+    # index into table of the prefix for each exponent of 10
+    exps = [round(math.log10(p.factor)) for p in table]
+    return [max([0] + [i for i, x in enumerate(exps) if x <= e])
+            for e in range(_DEC_MIN_EXP, _DEC_MAX_EXP + 1)]
+
+
+_DEC_INDEXES = {k: _dec_index(v) for k, v in _DEC_TABLES.items()}
+
+
+# binary prefix by the bit length of the value
+_BIN_BY_BITS = [_BIN_TABLE[max(n - 1, 0) // 10]
+                for n in range((len(_BIN_TABLE) - 1) * 10 + 2)]
+
+
+def _bin_prefix(value):
+    # value: int >= 0
+    n = value.bit_length()
+    # like value / factor >= 1.0, which rounds up just below a boundary
+    if n > 53 and value / (1 << n) >= 1.0:
+        n += 1
+    return _BIN_BY_BITS[min(n, len(_BIN_BY_BITS) - 1)]
+
+
+def _dec_prefix(value, restricted):
+    # value: int or float > 0 (or NaN)
+    table = _DEC_TABLES[restricted]
+    try:
+        e = math.floor(math.log10(value))
+    except (OverflowError, ValueError):  # inf or nan
+        e = _DEC_MAX_EXP if value > 1 else _DEC_MIN_EXP
+    i = _DEC_INDEXES[restricted][min(max(e, _DEC_MIN_EXP), _DEC_MAX_EXP) -
+                                 _DEC_MIN_EXP]
+    # log10 may be off by one near powers of 10
+    if i and value / table[i].factor < 1.0:
+        i -= 1
+    elif i + 1 < len(table) and value / table[i + 1].factor >= 1.0:
+        i += 1
+    return table[i]
+
 
 def bin_prefix(value):
     """Get an appropriate binary prefix for an integer number.
@@ -355,12 +572,7 @@ def bin_prefix(value):
     :raises TypeError: if value is not an integer
     """
     check_type(value, int, 'value')
-    if value == 0:
-        return NO_PREFIX
-    value = abs(value)
-    for p in BINARY_PREFIXES:
-        if value / p.factor >= 1.0:
-            return p
+    return _bin_prefix(abs(value))
 
 
 def find_bin_prefix(s):
@@ -401,6 +613,70 @@ def format_bin_prefix(num_frmt, value, prefix=None):
     return format(value / prefix.factor, num_frmt) + ' ' + prefix.symbol
 
 
+def _format_prefix_many(num_frmt, scaled, suffixes):
+    return list(map(add, map(format, scaled, repeat(num_frmt)), suffixes))
+
+
+def _check_array_kind(values, kinds, msg):
+    if values.dtype.kind not in kinds:
+        raise TypeError(msg)
+
+
+def format_bin_prefix_many(num_frmt, values, prefix=None):
+    """Format many numbers with binary prefixes.
+
+    Like :func:`format_bin_prefix` for each value but faster. If ``values``
+    is a NumPy array of integers, the prefixes are selected and the values
+    divided by their factors with vectorized operations.
+
+    >>> format_bin_prefix_many('.1f', [512, 1024**2+1024, -3 * 1024**3])
+    ['512.0 ', '1.0 Mi', '-3.0 Gi']
+
+    :param str num_frmt: number format string as used with :func:`format`
+    :param values: the numbers
+    :type values: iterable(int) or numpy.ndarray
+    :param prefix: can be a binary prefix object, name, or symbol
+    :type prefix: Prefix or str
+    :return: the formatted numbers (see :func:`format_bin_prefix`)
+    :rtype: list(str)
+    :raises TypeError: if a value is not an integer
+
+    .. versionadded:: 0.18.0
+    """
+    np = _numpy(values)
+    msg = 'values must be integers'
+    if prefix:
+        if not isinstance(prefix, Prefix):
+            prefix = find_bin_prefix(prefix) or NO_PREFIX
+        if np:
+            _check_array_kind(values, 'iu', msg)
+            scaled = (values / prefix.factor).tolist()
+        else:
+            scaled = []
+            for value in values:
+                check_type(value, int, msg=msg)
+                scaled.append(value / prefix.factor)
+        return _format_prefix_many(num_frmt, scaled,
+                                   repeat(' ' + prefix.symbol))
+    if np:
+        _check_array_kind(values, 'iu', msg)
+        # the exponent of 2 of the values as floats, i.e. the same as
+        # value / factor >= 1.0 in bin_prefix()
+        _, exp = np.frexp(np.abs(values.astype(np.float64)))
+        idx = np.clip((exp - 1) // 10, 0, len(_BIN_TABLE) - 1)
+        factors = np.array([float(p.factor) for p in _BIN_TABLE])
+        suffixes = np.array([' ' + p.symbol for p in _BIN_TABLE], object)
+        return _format_prefix_many(num_frmt,
+                                   (values / factors[idx]).tolist(),
+                                   suffixes[idx].tolist())
+    result = []
+    for value in values:
+        check_type(value, int, msg=msg)
+        p = _bin_prefix(abs(value))
+        result.append(format(value / p.factor, num_frmt) + ' ' + p.symbol)
+    return result
+
+
 def dec_prefix(value, restricted=True):
     """Get an appropriate decimal prefix for a number.
 
@@ -415,13 +691,7 @@ def dec_prefix(value, restricted=True):
     check_type(value, (int, float), 'value')
     if value == 0:
         return NO_PREFIX
-    value = abs(value)
-    for p in DECIMAL_PREFIXES:
-        if restricted and p.name in ('hecto', 'deca', 'deci', 'centi'):
-            continue
-        if value / p.factor >= 1.0:
-            return p
-    return p
+    return _dec_prefix(abs(value), bool(restricted))
 
 
 def find_dec_prefix(s):
@@ -470,13 +740,89 @@ def format_dec_prefix(num_frmt, value, prefix=None, restricted=True):
     return format(value / prefix.factor, num_frmt) + ' ' + prefix.symbol
 
 
+def format_dec_prefix_many(num_frmt, values, prefix=None, restricted=True):
+    """Format many numbers with decimal prefixes.
+
+    Like :func:`format_dec_prefix` for each value but faster. If ``values``
+    is a NumPy array of numbers, the prefixes are selected and the values
+    divided by their factors with vectorized operations.
+
+    >>> format_dec_prefix_many('.1f', [0.012, 1500, 0])
+    ['12.0 m', '1.5 k', '0.0 ']
+
+    :param str num_frmt: number format string as used with :func:`format`
+    :param values: the numbers
+    :type values: iterable(int or float) or numpy.ndarray
+    :param prefix: can be a decimal prefix object, name, or symbol;
+                   instead of the symbol ``µ`` the letter ``u`` can be used
+    :type prefix: Prefix or str
+    :param bool restricted: if ``True`` only integer powers of 1000 are used,
+                            i.e. *hecto, deca, deci, centi* are skipped.
+                            Ignored if ``prefix`` is set.
+    :return: the formatted numbers (see :func:`format_dec_prefix`)
+    :rtype: list(str)
+    :raises TypeError: if a value is not of type int or float
+
+    .. versionadded:: 0.18.0
+    """
+    np = _numpy(values)
+    msg = 'values must be of type int or float'
+    if prefix:
+        if not isinstance(prefix, Prefix):
+            prefix = find_dec_prefix(prefix) or NO_PREFIX
+        if np:
+            _check_array_kind(values, 'iuf', msg)
+            scaled = (values / prefix.factor).tolist()
+        else:
+            scaled = []
+            for value in values:
+                check_type(value, (int, float), msg=msg)
+                scaled.append(value / prefix.factor)
+        return _format_prefix_many(num_frmt, scaled,
+                                   repeat(' ' + prefix.symbol))
+    restricted = bool(restricted)
+    table = _DEC_TABLES[restricted]
+    if np:
+        _check_array_kind(values, 'iuf', msg)
+        idx = _dec_prefix_indexes(np, values, restricted)
+        factors = np.array([float(p.factor) for p in table])
+        suffixes = np.array([' ' + p.symbol for p in table], object)
+        return _format_prefix_many(num_frmt,
+                                   (values / factors[idx]).tolist(),
+                                   suffixes[idx].tolist())
+    result = []
+    for value in values:
+        check_type(value, (int, float), msg=msg)
+        p = _dec_prefix(abs(value), restricted) if value else NO_PREFIX
+        result.append(format(value / p.factor, num_frmt) + ' ' + p.symbol)
+    return result
+
+
+def _dec_prefix_indexes(np, values, restricted):
+    # Vectorized _dec_prefix(): return the indexes into the table.
+    table = _DEC_TABLES[restricted]
+    factors = np.array([float(p.factor) for p in table])
+    values = np.abs(values.astype(np.float64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        e = np.floor(np.log10(values))
+    e = np.nan_to_num(e, nan=_DEC_MIN_EXP, posinf=_DEC_MAX_EXP,
+                      neginf=_DEC_MIN_EXP)
+    e = np.clip(e, _DEC_MIN_EXP, _DEC_MAX_EXP).astype(np.intp)
+    idx = np.array(_DEC_INDEXES[restricted])[e - _DEC_MIN_EXP]
+    with np.errstate(invalid='ignore'):
+        idx -= (idx > 0) & (values / factors[idx] < 1.0)
+        upper = np.minimum(idx + 1, len(table) - 1)
+        idx += (idx + 1 < len(table)) & (values / factors[upper] >= 1.0)
+    idx[values == 0] = table.index(NO_PREFIX)
+    return idx
+
+
 _TIMEDELTA_FRMT_RE = re.compile(
     r'%(?P<flag>[0 ]?)(?P<width>\d*)(?P<code>[DHMSs])')
 
 _TdFmtTuple = namedtuple('TdFmtTuple', 'text, flag, width, code')
 
 
-@lru_cache(maxsize=32)
 def _timedelta_format(fmt_str):
     replacements = [('%X', '%02H:%02M:%02S'),
                     ('%Y', '%02H:%02M'),
@@ -498,6 +844,251 @@ def _timedelta_format(fmt_str):
     return lst, max_unit
 
 
+_TD_UNITS = ('s', 'S', 'M', 'H', 'D')
+
+
+def _td_split_s(days, seconds, us):
+    return (days * 86_400 + seconds) * 1_000_000 + us, 0, 0, 0, 0
+
+
+def _td_split_S(days, seconds, us):
+    return us, days * 86_400 + seconds, 0, 0, 0
+
+
+def _td_split_M(days, seconds, us):
+    minutes, seconds = divmod(seconds, 60)
+    return us, seconds, days * 1440 + minutes, 0, 0
+
+
+def _td_split_H(days, seconds, us):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return us, seconds, minutes, days * 24 + hours, 0
+
+
+def _td_split_D(days, seconds, us):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return us, seconds, minutes, hours, days
+
+
+_TD_SPLITS = {'s': _td_split_s, 'S': _td_split_S, 'M': _td_split_M,
+              'H': _td_split_H, 'D': _td_split_D}
+
+
+def _timedelta_parts(delta):
+    # Return days, seconds, microseconds of a delta >= 0.
+    if isinstance(delta, int):
+        if delta < 0:
+            raise ValueError('delta < 0')
+        days, seconds = divmod(delta, 86_400)
+        return days, seconds, 0
+    if isinstance(delta, float):
+        delta = timedelta(seconds=delta)
+    else:
+        check_type(delta, timedelta,
+                   msg='delta must be int, float or datetime.timedelta')
+    if delta.days < 0:
+        raise ValueError('delta < 0')
+    return delta.days, delta.seconds, delta.microseconds
+
+
+def _compile_timedelta_format(fmt, max_unit):
+    # Return a function (days, seconds, microseconds) -> str. All fields
+    # are rendered with one %-format; the values are picked from the
+    # split of the delta plus the rounded microseconds for '%s' fields
+    # with a width (if the largest unit is not microseconds).
+    template = []
+    indices = []
+    exponents = []
+    for x in fmt:
+        if not isinstance(x, tuple):
+            template.append(x.replace('%', '%%'))
+            continue
+        template.append(x.text.replace('%', '%%'))
+        if x.code == 's' and max_unit != 's':
+            e = (6 - int(x.width)) if x.width else 0
+            if e not in exponents:
+                exponents.append(e)
+            indices.append(len(_TD_UNITS) + exponents.index(e))
+            template.append(f'%{x.flag}{x.width}d' if x.flag else '%d')
+        else:
+            indices.append(_TD_UNITS.index(x.code))
+            template.append(f'%{x.flag}{x.width}d')
+    template = ''.join(template)
+    if not indices:
+        text = template % ()
+        return lambda days, seconds, us: text
+    split = _TD_SPLITS[max_unit]
+    get = itemgetter(*indices)
+    if not exponents:
+        return lambda days, seconds, us: template % get(
+            split(days, seconds, us))
+    divisors = tuple(10 ** e for e in exponents)
+
+    def func(days, seconds, us):
+        values = split(days, seconds, us)
+        values += tuple([round(us / d) for d in divisors])
+        return template % get(values)
+    return func
+
+
+class TimedeltaFormat:
+    """Compiled format for time deltas.
+
+    The format string is parsed only once when the object is created. Use
+    this class instead of :func:`format_timedelta` if many time deltas are
+    formatted with the same format string.
+
+    >>> fmt = TimedeltaFormat('%Z.%03s')
+    >>> fmt.format(3678.0123)
+    '61:18.012'
+    >>> list(fmt.format_many([1, 62.5]))
+    ['00:01.000', '01:02.500']
+
+    :param str fmt_str: string with
+                    :ref:`format specifiers <ref-timedelta-format-specifiers>`
+    :raises ValueError: if a ``width`` < 1
+
+    .. versionadded:: 0.18.0
+    """
+
+    def __init__(self, fmt_str):
+        self._fmt, self._max_unit = _timedelta_format(fmt_str)
+        self._func = _compile_timedelta_format(self._fmt, self._max_unit)
+
+    def format(self, delta):
+        """Format a time delta.
+
+        See :func:`format_timedelta`.
+
+        :param delta: the time delta
+        :type delta: int or float or datetime.timedelta
+        :return: the formatted time delta
+        :rtype: str
+        :raises TypeError: if the given ``delta`` is not
+                           ``int, float or timedelta``
+        :raises ValueError: if the given ``delta`` is negative
+        """
+        return self._func(*_timedelta_parts(delta))
+
+    def format_many(self, deltas):
+        """Format many time deltas.
+
+        :param deltas: the time deltas
+        :type deltas: iterable(int or float or datetime.timedelta)
+        :return: iterator over the formatted time deltas
+        :raises TypeError: if a ``delta`` is not ``int, float or timedelta``
+        :raises ValueError: if a ``delta`` is negative
+        """
+        func = self._func
+        for delta in deltas:
+            yield func(*_timedelta_parts(delta))
+
+    def format_array(self, deltas):
+        """Format an array of time deltas.
+
+        The fields are computed and rendered with vectorized NumPy
+        operations; there is no Python loop over the elements. Seconds given
+        as floats are rounded to microseconds, ``timedelta64`` values with a
+        smaller unit are truncated to microseconds.
+
+        >>> import numpy as np
+        >>> fmt = TimedeltaFormat('%Z.%03s')
+        >>> fmt.format_array(np.array([1, 62.5]))
+        array(['00:01.000', '01:02.500'], dtype='<U9')
+
+        Requires `NumPy <https://pypi.org/project/numpy/>`_.
+
+        :param deltas: the time deltas as seconds or ``timedelta64``
+        :type deltas: numpy.ndarray or array-like
+        :return: array with the formatted time deltas (same shape)
+        :rtype: numpy.ndarray
+        :raises TypeError: if the array is not numeric or ``timedelta64``
+        :raises ValueError: if a ``delta`` is negative or ``NaT``
+        :raises OverflowError: if a ``delta`` in seconds does not fit into
+                               64-bit microseconds
+        """
+        import numpy as np
+        total = _array_microseconds(np, deltas)
+        days, rest = divmod(total, 86_400_000_000)
+        seconds, us = divmod(rest, 1_000_000)
+        values = _TD_SPLITS[self._max_unit](days, seconds, us)
+        strings = getattr(np, 'strings', np.char)  # np.strings: NumPy >= 2
+        result = np.full(total.shape, '')
+        for x in self._fmt:
+            if not isinstance(x, tuple):
+                if x:
+                    result = strings.add(result, x)
+                continue
+            if x.code == 's' and self._max_unit != 's':
+                e = (6 - int(x.width)) if x.width else 0
+                v = np.rint(us / 10 ** e).astype(np.int64)
+                flag, width = x.flag, (x.width if x.flag else '')
+            else:
+                v = np.asarray(values[_TD_UNITS.index(x.code)], np.int64)
+                flag, width = x.flag, x.width
+            v = _int_array_str(np, strings, v, flag, width)
+            if x.text:
+                result = strings.add(result, x.text)
+            result = strings.add(result, v)
+        return result
+
+
+_LOOKUP_MAX = 100_000
+
+
+def _int_array_str(np, strings, values, flag, width):
+    # Render an array of ints >= 0 like '%{flag}{width}d'. If the values
+    # are small, only the numbers up to the maximum are rendered and the
+    # result is taken from this lookup table.
+    maximum = int(values.max()) if values.size else 0
+    lookup = maximum < _LOOKUP_MAX
+    s = np.arange(maximum + 1) if lookup else values
+    # a string dtype of the needed size is much faster than str
+    s = s.astype('U%d' % len(str(maximum)))
+    if flag == ' ':
+        s = strings.add(' ', s)
+    if width:
+        if flag == '0':
+            s = strings.zfill(s, int(width))
+        else:
+            s = strings.rjust(s, int(width))
+    return s[values] if lookup else s
+
+
+def _array_microseconds(np, deltas):
+    # Return the deltas as int64 array of microseconds.
+    deltas = np.asarray(deltas)
+    limit = np.iinfo(np.int64).max // 1_000_000
+    if deltas.dtype.kind == 'm':
+        us = deltas.astype('timedelta64[us]').astype(np.int64)
+    elif deltas.dtype.kind in 'iub':
+        if ((deltas > limit) | (deltas < -limit)).any():
+            raise OverflowError('delta too large')
+        us = deltas.astype(np.int64) * 1_000_000
+    elif deltas.dtype.kind == 'f':
+        if np.isnan(deltas).any():
+            raise ValueError('delta is NaN')
+        if not (np.abs(deltas) < limit).all():
+            raise OverflowError('delta too large')
+        # like datetime.timedelta: round only the fractional part
+        frac, whole = np.modf(deltas)
+        us = (whole.astype(np.int64) * 1_000_000 +
+              np.rint(frac * 1_000_000).astype(np.int64))
+    else:
+        raise TypeError('deltas must be numeric or timedelta64')
+    if (us < 0).any():
+        raise ValueError('delta < 0')
+    return us
+
+
+# compiled formats are small, so many of them can be cached
+@lru_cache(maxsize=256)
+def _timedelta_formatter(fmt_str):
+    return TimedeltaFormat(fmt_str)
+
+
 def format_timedelta(fmt_str, delta):
     """Format a time delta.
 
@@ -539,6 +1130,9 @@ def format_timedelta(fmt_str, delta):
 
     The codes ``'X', 'Y', 'Z'`` cannot be used with flags and field widths.
 
+    All other text, including a ``'%'`` that does not start a format
+    specifier, is copied literally.
+
     If the field width for microseconds (code ``'s'``) is less than 6 it will
     be counted from the left. So ``'%3s'`` will get milliseconds.
 
@@ -560,51 +1154,133 @@ def format_timedelta(fmt_str, delta):
     :rtype: str
     :raises TypeError: if the given ``delta`` is not ``int, float or timedelta``
     :raises ValueError: if the given ``delta`` is negative or ``width`` < 1
+
+    .. versionchanged:: 0.18.0
+       Use a cached :class:`TimedeltaFormat`; the text between the format
+       specifiers is copied literally (before, a ``'%'`` in the text in
+       front of a specifier was interpreted, e.g. ``'%%'`` gave ``'%'``)
     """
-    if isinstance(delta, (int, float)):
-        delta = timedelta(seconds=delta)
-    else:
-        check_type(delta, timedelta,
-                   msg='delta must be int, float or datetime.timedelta')
-    if delta.total_seconds() < 0:
-        raise ValueError('delta < 0')
-    fmt, max_unit = _timedelta_format(fmt_str)
-    args = {'s': 0, 'S': 0, 'M': 0, 'H': 0, 'D': 0}
-    if max_unit == 's':
-        args['s'] = ((delta.days * 86_400 + delta.seconds) *
-                     1_000_000 + delta.microseconds)
-    else:
-        args['s'] = delta.microseconds
-        delta_rest = delta.seconds
-        if max_unit == 'S':
-            args['S'] = delta.days * 86_400 + delta_rest
-        else:
-            delta_rest, args['S'] = divmod(delta_rest, 60)
-            if max_unit == 'M':
-                args['M'] = delta.days * 1440 + delta_rest
-            else:
-                delta_rest, args['M'] = divmod(delta_rest, 60)
-                if max_unit == 'H':
-                    args['H'] = delta.days * 24 + delta_rest
+    return _timedelta_formatter(fmt_str).format(delta)
+
+
+# factors to microseconds; None for the fractional part of a second
+_TD_PARSE_FACTORS = {'s': None, 'S': 1_000_000, 'M': 60_000_000,
+                     'H': 3_600_000_000, 'D': 86_400_000_000}
+
+
+class TimedeltaParser:
+    """Compiled parser for time deltas.
+
+    The format string is translated into a compiled regular expression only
+    once when the object is created. Use this class instead of
+    :func:`parse_timedelta` if many strings are parsed with the same format
+    string.
+
+    >>> parser = TimedeltaParser('%M:%02S.%s')
+    >>> parser.parse('03:21.001')
+    datetime.timedelta(seconds=201, microseconds=1000)
+    >>> [str(x) for x in parser.parse_many(['00:01.5', '61:00.0'])]
+    ['0:00:01.500000', '1:01:00']
+
+    :param str fmt_str: string with
+                    :ref:`format specifiers <ref-timedelta-format-specifiers>`
+    :raises ValueError: if a ``width`` < 1
+
+    .. versionadded:: 0.18.0
+    """
+
+    def __init__(self, fmt_str):
+        fmt, _ = _timedelta_format(fmt_str)
+        lst = []
+        factors = []
+        for x in fmt:
+            if isinstance(x, tuple):
+                if x.width and int(x.width) > 1:
+                    s = r'(?P<%(code)s>[ \d]{%(width)s})'
                 else:
-                    args['H'] = delta_rest
-                    if max_unit == 'D':
-                        args['D'] = delta.days
-    fmt_lst = []
-    for x in fmt:
-        if isinstance(x, tuple):
-            if x.code == 's' and max_unit != 's':
-                e = (6 - int(x.width)) if x.width else 0
-                v = round(float(args['s']) / 10 ** e)
-                if x.flag:
-                    v = f'%{x.flag}{x.width}d' % v
-                s = f'{x.text}{v}'
+                    s = r'(?P<%(code)s>\d+)'
+                lst.append(x.text + s % x._asdict())
+                factors.append(_TD_PARSE_FACTORS[x.code])
             else:
-                s = f'{x.text}%({x.code}){x.flag}{x.width}d' % args
-        else:
-            s = x
-        fmt_lst.append(s)
-    return ''.join(fmt_lst)
+                lst.append(x)
+        self._fmt_str = fmt_str
+        self._match = re.compile(''.join(lst)).fullmatch
+        self._factors = tuple(factors)
+
+    def parse(self, string):
+        """Parse a string as a time delta.
+
+        See :func:`parse_timedelta`.
+
+        :param str string: the string
+        :return: timedelta object
+        :rtype: datetime.timedelta
+        :raises ValueError: if the string cannot be parsed
+        """
+        return timedelta(microseconds=self._microseconds(string))
+
+    def _microseconds(self, string):
+        m = self._match(string)
+        if not m:
+            raise ValueError('time data %r does not match format %r' %
+                             (string, self._fmt_str))
+        us = 0
+        for factor, v in zip(self._factors, m.groups()):
+            if factor:
+                us += int(v) * factor
+            else:
+                v = v.lstrip()
+                us += round(int(v) * 10**(6 - len(v)))
+        return us
+
+    def parse_many(self, strings):
+        """Parse many strings as time deltas.
+
+        :param strings: the strings
+        :type strings: iterable(str)
+        :return: iterator over the timedelta objects
+        :raises ValueError: if a string cannot be parsed
+        """
+        parse = self.parse
+        for string in strings:
+            yield parse(string)
+
+    def parse_array(self, strings):
+        """Parse an array of strings as time deltas.
+
+        The strings are matched one by one (regular expressions cannot be
+        vectorized), but the results are collected directly in a NumPy
+        array without creating :class:`datetime.timedelta` objects.
+
+        >>> import numpy as np
+        >>> parser = TimedeltaParser('%M:%02S.%s')
+        >>> parser.parse_array(np.array(['00:01.5', '61:00.0']))
+        array([   1500000, 3660000000], dtype='timedelta64[us]')
+
+        Requires `NumPy <https://pypi.org/project/numpy/>`_.
+
+        :param strings: the strings
+        :type strings: numpy.ndarray or iterable(str)
+        :return: array with the time deltas (same shape if ``strings`` is
+                 an array)
+        :rtype: numpy.ndarray of type ``timedelta64[us]``
+        :raises ValueError: if a string cannot be parsed
+        """
+        import numpy as np
+        shape = None
+        if isinstance(strings, np.ndarray):
+            shape = strings.shape
+            strings = strings.ravel().tolist()
+        us = np.fromiter(map(self._microseconds, strings), np.int64)
+        if shape is not None:
+            us = us.reshape(shape)
+        return us.astype('timedelta64[us]')
+
+
+# compiled parsers are small, so many of them can be cached
+@lru_cache(maxsize=256)
+def _timedelta_parser(fmt_str):
+    return TimedeltaParser(fmt_str)
 
 
 def parse_timedelta(string, fmt_str):
@@ -630,33 +1306,11 @@ def parse_timedelta(string, fmt_str):
     :return: timedelta object
     :rtype: datetime.timedelta
     :raises ValueError: if the string cannot be parsed
+
+    .. versionchanged:: 0.18.0
+       Use a cached :class:`TimedeltaParser`
     """
-    fmt, _ = _timedelta_format(fmt_str)
-    lst = []
-    for x in fmt:
-        if isinstance(x, tuple):
-            s = '%(text)s'
-            if x.width and int(x.width) > 1:
-                s += r'(?P<%(code)s>[ \d]{' + x.width + '})'
-            else:
-                s += r'(?P<%(code)s>\d+)'
-            lst.append(s % x._asdict())
-        else:
-            lst.append(x)
-    m = re.fullmatch(''.join(lst), string)
-    if m:
-        args = {'s': 0, 'S': 0, 'M': 0, 'H': 0, 'D': 0}
-        for k, v in m.groupdict().items():
-            if k == 's':
-                s = v.lstrip()
-                args[k] = round(int(s) * 10**(6 - len(s)))
-            else:
-                args[k] = int(v)
-        return timedelta(days=args['D'], hours=args['H'], minutes=args['M'],
-                         seconds=args['S'], microseconds=args['s'])
-    else:
-        raise ValueError('time data %r does not match format %r' %
-                         (string, fmt_str))
+    return _timedelta_parser(fmt_str).parse(string)
 
 
 def is_hexdigit(s):
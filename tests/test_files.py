@@ -0,0 +1,201 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from salmagundi import files
+
+MiB = 1024 * 1024
+
+
+def _make_sparse(path, size, chunks):
+    with open(path, 'wb') as fh:
+        fh.truncate(size)
+        for offset, data in chunks:
+            fh.seek(offset)
+            fh.write(data)
+    st = os.stat(path)
+    if st.st_blocks * 512 >= st.st_size:
+        pytest.skip('file system does not support sparse files')
+
+
+def _copy(src, dst, cancel_evt=None, cancel_after=None):
+    calls = []
+
+    def cb(copied, total):
+        calls.append((copied, total))
+        if cancel_after and len(calls) >= cancel_after:
+            cancel_evt.set()
+
+    files.copyfile(src, dst, cb, cancel_evt)
+    return calls
+
+
+@pytest.mark.parametrize('chunks', [
+    [(0, b'a' * 100), (MiB + 5, b'b' * 5000), (3 * MiB, b'c' * 10)],
+    [(2 * MiB, b'x' * 4096), (4 * MiB - 10, b'end' * 3 + b'!')],
+], ids=['hole-at-end', 'data-at-end'])
+def test_copyfile_sparse(tmp_path, chunks):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    _make_sparse(src, 4 * MiB, chunks)
+    calls = _copy(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+    assert os.stat(dst).st_size == 4 * MiB
+    assert os.stat(dst).st_blocks <= os.stat(src).st_blocks + 16
+    assert calls[-1] == (4 * MiB, 4 * MiB)
+
+
+def test_copyfile_sparse_disabled(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    _make_sparse(src, 4 * MiB, [(MiB, b'data')])
+    files.copyfile(src, dst, None, None, sparse=False)
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_copyfile_sparse_cancel(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    _make_sparse(src, 4 * MiB, [(0, b'a' * 100), (2 * MiB, b'b' * 100)])
+    evt = threading.Event()
+    calls = _copy(src, dst, evt, cancel_after=1)
+    assert len(calls) == 1
+    assert calls[0][0] < 4 * MiB
+
+
+@pytest.mark.parametrize('data', [b'a\r\nb\r\n', b'a\r\nb', b'a\nb\r\n\r\n',
+                                  b'', b'x\r'])
+def test_iter_lines_reverse_crlf(tmp_path, data):
+    path = tmp_path / 'f'
+    path.write_bytes(data)
+    assert list(files.iter_lines_reverse(path))[::-1] == \
+        files.read_lines(path)
+
+
+@pytest.mark.parametrize('positions', [False, True])
+def test_scan_lines_crlf(tmp_path, positions):
+    path = tmp_path / 'f'
+    path.write_bytes(b'a\r\nb\r\nab\r\n')
+    lines = files.scan_lines(path, _ends_with_b, workers=1,
+                             positions=positions)
+    if positions:
+        assert [(x[0], x[2]) for x in lines] == [(1, 'b'), (2, 'ab')]
+    else:
+        assert lines == files.read_lines(path, _ends_with_b) == ['b', 'ab']
+
+
+def _ends_with_b(line):
+    return line.endswith('b')
+
+
+@pytest.mark.parametrize('second_run', [{'link': True}, {'dedup': True}, {}])
+def test_copytree_link_resync(tmp_path, second_run):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    (src / 'a').write_bytes(b'same content')
+    (src / 'b').write_bytes(b'same content')
+    index = files.HashIndex()
+    files.copytree(src, dst, _ignore, None, link=True, hash_index=index,
+                   max_workers=1)
+    assert os.stat(dst / 'a').st_ino == os.stat(dst / 'b').st_ino
+    (src / 'a').write_bytes(b'CHANGED a')
+    files.copytree(src, dst, _ignore, None, hash_index=index, max_workers=1,
+                   **second_run)
+    assert (dst / 'a').read_bytes() == b'CHANGED a'
+    assert (dst / 'b').read_bytes() == b'same content'
+
+
+def _ignore(*args):
+    pass
+
+
+@pytest.mark.parametrize('first, second', [(None, 'md5'), ('sha1', None),
+                                           ('md5', 'md5')])
+def test_copyfile_resume_other_checksum(tmp_path, first, second):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    data = os.urandom(100_000)
+    src.write_bytes(data)
+    evt = threading.Event()
+    calls = _copy_resume(src, dst, evt, first, cancel_after=3)
+    offset = calls[-1][0]
+    assert 0 < offset < len(data)
+    calls = []
+    result = files.copyfile(src, dst, lambda c, t: calls.append(c), None,
+                            chunk_size=4096, resume=True, checksum=second)
+    assert calls[0] == offset
+    assert dst.read_bytes() == data
+    assert result == (hashlib.new(second, data).hexdigest() if second
+                      else None)
+    assert not os.path.exists(str(dst) + '.journal')
+
+
+def _copy_resume(src, dst, evt, checksum, cancel_after):
+    calls = []
+
+    def cb(copied, total):
+        calls.append((copied, total))
+        if len(calls) >= cancel_after:
+            evt.set()
+
+    assert files.copyfile(src, dst, cb, evt, chunk_size=4096, resume=True,
+                          checksum=checksum) is None
+    return calls
+
+
+def test_touch_many_fd_no_follow(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'')
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        assert files.touch_many([fd], 1_000_000, follow_symlinks=False) == {}
+        assert files.touch_many([fd], 1_000_000, mtime=False,
+                                follow_symlinks=False) == {}
+    finally:
+        os.close(fd)
+    assert path.stat().st_mtime == 1_000_000
+
+
+def test_follow_crlf(tmp_path):
+    path = tmp_path / 'log'
+    path.write_bytes(b'a\r\nb\rc\r\nd\r')
+    evt = threading.Event()
+    it = files.follow(path, encoding='ascii', from_start=True, interval=0.01,
+                      cancel_evt=evt)
+    assert next(it) == 'a'
+    assert next(it) == 'b\rc'
+    os.rename(path, tmp_path / 'log.1')
+    path.write_bytes(b'e\r\n')
+    assert next(it) == 'd'
+    assert next(it) == 'e'
+    evt.set()
+    assert list(it) == []
+
+
+def _walk_names(top, **kwargs):
+    return sorted(os.path.relpath(e.path, top)
+                  for e in files.walk(top, **kwargs))
+
+
+def test_walk(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'small').write_bytes(b'x')
+    (tmp_path / 'sub' / 'big').write_bytes(b'x' * 100)
+    assert _walk_names(tmp_path) == ['small', os.path.join('sub', 'big')]
+    assert _walk_names(tmp_path, dirs=True) == [
+        'small', 'sub', os.path.join('sub', 'big')]
+    assert _walk_names(tmp_path, min_size=10) == [os.path.join('sub', 'big')]
+    assert _walk_names(tmp_path, max_size=10) == ['small']
+    assert _walk_names(tmp_path, predicate=lambda e: e.name == 'big') == [
+        os.path.join('sub', 'big')]
+
+
+def test_walk_dir_symlink(tmp_path):
+    top = tmp_path / 'top'
+    (tmp_path / 'target').mkdir()
+    (tmp_path / 'target' / 'big').write_bytes(b'x' * 100)
+    top.mkdir()
+    (top / 'link').symlink_to(tmp_path / 'target', target_is_directory=True)
+    assert _walk_names(top) == []
+    assert _walk_names(top, max_size=10**6) == []
+    assert _walk_names(top, dirs=True, max_size=10) == ['link']
+    assert _walk_names(top, follow_symlinks=True) == [
+        os.path.join('link', 'big')]